@@ -0,0 +1,84 @@
+# Copyright (C) 2018, 2019 Simon Dirmeier
+#
+# This file is part of pybda.
+#
+# pybda is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pybda is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pybda. If not, see <http://www.gnu.org/licenses/>.
+#
+# @author = 'Simon Dirmeier'
+# @email = 'simon.dirmeier@bsse.ethz.ch'
+
+"""
+Measure the driver-side planning time of casting and assembling feature
+columns against the number of columns.
+
+Compares chaining one 'withColumn' per column (how 'to_double' and
+'assemble' used to work) with the single projections of
+'pybda.spark.features'. No job is run: the timings only cover building the
+data frame and optimizing its plan.
+
+Usage:
+
+    python planning_benchmark.py 100 500 1000 3000
+"""
+
+import sys
+import time
+
+from pyspark.ml.feature import VectorAssembler
+from pyspark.sql import SparkSession
+from pyspark.sql.functions import lit
+
+from pybda.globals import FEATURES__
+from pybda.spark.features import assemble, to_double
+
+
+def _frame(spark, n_cols):
+    return spark.range(1).select(
+      [lit(str(i)).alias("x{}".format(i)) for i in range(n_cols)])
+
+
+def _chained(data, feature_cols):
+    for x in feature_cols:
+        data = data.withColumn(x, data[x].cast("float"))
+    data = VectorAssembler(
+      inputCols=feature_cols, outputCol=FEATURES__).transform(data)
+    return data.drop(*feature_cols)
+
+
+def _projected(data, feature_cols):
+    return assemble(to_double(data, feature_cols), feature_cols)
+
+
+def _time(fn, spark, n_cols):
+    data = _frame(spark, n_cols)
+    start = time.time()
+    data = fn(data, data.columns)
+    data._jdf.queryExecution().optimizedPlan()
+    return time.time() - start
+
+
+def run(column_counts):
+    spark = SparkSession.builder.master("local[1]").getOrCreate()
+    spark.sparkContext.setLogLevel("ERROR")
+    print("{:>10}{:>15}{:>15}".format("columns", "chained [s]", "select [s]"))
+    for n_cols in column_counts:
+        print("{:>10}{:>15.3f}{:>15.3f}".format(
+          n_cols,
+          _time(_chained, spark, n_cols),
+          _time(_projected, spark, n_cols)))
+    spark.stop()
+
+
+if __name__ == "__main__":
+    run([int(x) for x in sys.argv[1:]] or [100, 500, 1000, 2000, 3000])
@@ -21,10 +21,11 @@
 import logging
 import pathlib
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 
 import pandas
 
-from pybda.globals import GMM__, TOTAL_VAR_
+from pybda.globals import GMM__, TOTAL_VAR_, TSV_
 from pybda.io.as_filename import as_ssefile
 from pybda.io.io import write_line
 from pybda.spark_model import SparkModel
@@ -35,7 +36,7 @@ logger.setLevel(logging.INFO)
 
 
 class Clustering(SparkModel):
-    def __init__(self, spark, clusters, threshold, max_iter, kind):
+    def __init__(self, spark, clusters, threshold, max_iter, kind, n_jobs=1):
         super().__init__(spark)
         self.__kind = kind
         if kind == GMM__:
@@ -49,6 +50,7 @@ class Clustering(SparkModel):
         self.__threshold = threshold
         self.__max_iter = max_iter
         self.__clusters = clusters
+        self.__n_jobs = max(1, min(n_jobs, len(clusters)))
         self.__model = None
 
     @property
@@ -63,6 +65,10 @@ class Clustering(SparkModel):
     def clusters(self):
         return self.__clusters
 
+    @property
+    def n_jobs(self):
+        return self.__n_jobs
+
     @property
     def max_iter(self):
         return self.__max_iter
@@ -76,7 +82,7 @@ class Clustering(SparkModel):
         pass
 
     @abstractmethod
-    def write(self, data, outpath=None):
+    def write(self, data, outpath=None, fmt=TSV_, compression=None):
         pass
 
     @staticmethod
@@ -103,10 +109,51 @@ class Clustering(SparkModel):
         return sse
 
     def _fit(self, models, outpath, data, n, p, stat):
-        for k in self.clusters:
-            models[k] = self._fit_one(k, data, n, p, stat)
+        """
+        Fit a model for every number of clusters. If 'n_jobs' is larger than
+        one, up to 'n_jobs' models are fit concurrently from a pool of driver
+        threads, each submitting its jobs to its own scheduler pool, such
+        that executors are not left idle while a small K finishes. Every fit
+        is written as soon as it completes, the profile is filled in the
+        order of 'clusters'.
+
+        Scheduler pools only share the executors fairly if
+        'spark.scheduler.mode' is 'FAIR', which the kmeans and gmm commands
+        and the pipeline request when 'n_jobs' is larger than one. Moreover,
+        Spark 2.4 does not pin Python threads to JVM threads, so the pool of
+        a thread is only assigned on a best-effort basis and jobs of
+        different K may end up in the same pool.
+        """
+
+        if self.n_jobs == 1:
+            for k in self.clusters:
+                models[k] = self._fit_and_write(k, data, n, p, stat, outpath)
             if outpath:
-                models[k].write(outpath)
+                models.write(outpath)
+            return models
+
+        logger.info("Fitting %d models using %d threads",
+                    len(self.clusters), self.n_jobs)
+        with ThreadPoolExecutor(max_workers=self.n_jobs) as executor:
+            # larger K take longer, so start them first
+            futures = {
+                k: executor.submit(
+                  self._fit_pooled, k, data, n, p, stat, outpath)
+                for k in sorted(self.clusters, reverse=True)
+            }
+            for k in self.clusters:
+                models[k] = futures[k].result()
         if outpath:
             models.write(outpath)
         return models
+
+    def _fit_pooled(self, k, data, n, p, stat, outpath):
+        self.spark.sparkContext.setLocalProperty(
+          "spark.scheduler.pool", "{}-K{}".format(self.__kind, k))
+        return self._fit_and_write(k, data, n, p, stat, outpath)
+
+    def _fit_and_write(self, k, data, n, p, stat, outpath):
+        model = self._fit_one(k, data, n, p, stat)
+        if outpath:
+            model.write(outpath)
+        return model
@@ -21,9 +21,13 @@
 
 import os
 
+from pybda.globals import TSV_
+from pybda.io.as_filename import as_datafile
+
 
 class RuleNode:
-    def __init__(self, method, algorithm, parent, infile, outfolder):
+    def __init__(self, method, algorithm, parent, infile, outfolder,
+                 fmt=TSV_):
         self.__method = method
         self.__algorithm = algorithm
         self.__parent = parent
@@ -31,7 +35,8 @@ class RuleNode:
         self.__infile = infile if parent is None else parent.outfile
         self.__level = 0 if parent is None else parent.level + 1
         try:
-            self.__outfile = os.path.join(outfolder, algorithm) + ".tsv"
+            self.__outfile = as_datafile(
+              os.path.join(outfolder, algorithm), fmt)
         except TypeError:
             self.__outfile = outfolder
 
@@ -20,16 +20,17 @@
 
 
 from pybda.config.rule_node import RuleNode
-from pybda.globals import PREPROCESSING_METHODS__, PARENT_METHODS__
+from pybda.globals import PREPROCESSING_METHODS__, PARENT_METHODS__, TSV_
 
 
 class RuleTree:
-    def __init__(self, infile, outfolder):
+    def __init__(self, infile, outfolder, fmt=TSV_):
         self.__root = RuleNode("_", None, None, "", infile)
         self.__curr = self.__root
         self.__nodes = {}
         self.__infile = infile
         self.__outfolder = outfolder
+        self.__fmt = fmt
 
     def __str__(self):
         stack = [self.__root]
@@ -47,13 +48,18 @@ class RuleTree:
                 " (" + node.infile + ", " + node.outfile + ")\n"
         return stri
 
+    @property
+    def root(self):
+        return self.__root
+
     @property
     def nodes(self):
         return self.__nodes
 
     def add(self, method, algorithm):
         par = self.__get_proper_parent(method)
-        n = RuleNode(method, algorithm, par, self.__infile, self.__outfolder)
+        n = RuleNode(method, algorithm, par, self.__infile, self.__outfolder,
+                     self.__fmt)
         self.__nodes[method] = n
         par.add(n)
         self.__curr = n
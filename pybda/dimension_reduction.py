@@ -19,19 +19,48 @@
 # @email = 'simon.dirmeier@bsse.ethz.ch'
 
 
+import logging
 from abc import abstractmethod
 
+from pyspark import StorageLevel
+
+from pybda.globals import BLOCK_SIZE_, MEMORY_AND_DISK_
+from pybda.spark.dataframe import project
 from pybda.spark_model import SparkModel
 from pybda.util.cast_as import as_rdd_of_array
 
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def as_storage_level(storage_level):
+    """
+    Get a spark storage level from its name, e.g. 'MEMORY_ONLY'.
+
+    :param storage_level: either the name of a storage level or a
+     StorageLevel
+    :return: returns a StorageLevel
+    """
+
+    if isinstance(storage_level, StorageLevel):
+        return storage_level
+    level = getattr(StorageLevel, str(storage_level).upper(), None)
+    if not isinstance(level, StorageLevel):
+        raise ValueError("Storage level '{}' not supported".format(
+          storage_level))
+    return level
+
 
 class DimensionReduction(SparkModel):
-    def __init__(self, spark, features, threshold, max_iter):
+    def __init__(self, spark, features, threshold, max_iter,
+                 storage_level=MEMORY_AND_DISK_):
         super().__init__(spark)
         self.__features = features
         self.__threshold = threshold
         self.__max_iter = max_iter
         self.__model = None
+        self.__storage_level = as_storage_level(storage_level)
+        self.__persisted = []
 
     @property
     def model(self):
@@ -44,6 +73,14 @@ class DimensionReduction(SparkModel):
     def write(self, outfolder):
         self.model.write(outfolder)
 
+    @property
+    def storage_level(self):
+        return self.__storage_level
+
+    @storage_level.setter
+    def storage_level(self, storage_level):
+        self.__storage_level = as_storage_level(storage_level)
+
     @property
     def features(self):
         return self.__features
@@ -70,3 +107,44 @@ class DimensionReduction(SparkModel):
 
     def _feature_matrix(self, data):
         return as_rdd_of_array(data.select(self.features))
+
+    def _persist(self, X):
+        """
+        Persist an RDD that is read several times during a fit, e.g. the
+        centered or whitened feature matrix, at the storage level of the model.
+        The RDD is kept until `_unpersist` is called at the end of the fit.
+
+        :param X: an RDD
+        :return: returns the persisted RDD
+        """
+
+        X.persist(self.storage_level)
+        self.__persisted.append(X)
+        return X
+
+    def _unpersist(self):
+        """
+        Log the storage metrics of all RDDs persisted during a fit and release
+        them.
+        """
+
+        infos = {i.id(): i for i in
+                 self.spark.sparkContext._jsc.sc().getRDDStorageInfo()}
+        for X in self.__persisted:
+            info = infos.get(X.id())
+            if info is None:
+                logger.info("RDD %d has not been cached", X.id())
+            else:
+                logger.info(
+                  "RDD %d: %d of %d partitions cached, %d bytes in memory, "
+                  "%d bytes on disk", X.id(), info.numCachedPartitions(),
+                  info.numPartitions(), info.memSize(), info.diskSize())
+            X.unpersist()
+        self.__persisted = []
+
+    def _broadcast(self, value):
+        return self.spark.sparkContext.broadcast(value)
+
+    def _project(self, data, fn, block_size=BLOCK_SIZE_):
+        return project(data, self.features, fn, self.spark,
+                       block_size=block_size)
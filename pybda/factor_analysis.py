@@ -23,52 +23,75 @@ import logging
 
 import click
 import numpy
-import pyspark.sql.functions as func
-from pyspark.mllib.linalg.distributed import RowMatrix, DenseMatrix
+from scipy import linalg
+from pyspark.mllib.linalg.distributed import RowMatrix
 
 from pybda.dimension_reduction import DimensionReduction
 from pybda.fit.factor_analysis_fit import FactorAnalysisFit
 from pybda.fit.factor_analysis_transform import FactorAnalysisTransform
-from pybda.spark.dataframe import join
+from pybda.globals import AUTO_, EM_, MEMORY_AND_DISK_, SVD_
 from pybda.stats.linalg import svd
-from pybda.stats.stats import column_statistics, center
+from pybda.stats.stats import center, sufficient_statistics
+from pybda.util.options import (cache_options, output_options,
+                                storage_options)
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
 class FactorAnalysis(DimensionReduction):
-    def __init__(self, spark, n_factors, features, threshold=1e-3, max_iter=25):
-        super().__init__(spark, features, threshold, max_iter)
+    def __init__(self, spark, n_factors, features, threshold=1e-3, max_iter=25,
+                 method=AUTO_, algorithm=SVD_, storage_level=MEMORY_AND_DISK_):
+        super().__init__(spark, features, threshold, max_iter, storage_level)
+        if algorithm not in [SVD_, EM_]:
+            raise ValueError("Factor analysis algorithm '{}' not supported"
+                             .format(algorithm))
         self.__eps = 1e-09
         self.__n_factors = n_factors
+        self.__method = method
+        self.__algorithm = algorithm
 
     @property
     def n_factors(self):
         return self.__n_factors
 
+    @property
+    def method(self):
+        return self.__method
+
+    @property
+    def algorithm(self):
+        return self.__algorithm
+
     def fit(self, data):
         self._fit(data)
         return self
 
     def _fit(self, data):
         logger.info("Fitting factor analysis..")
-        X, _, var = self._preprocess_data(data)
-        loadings, ll, psi = self._estimate(X, var, self.n_factors)
-        self.model = FactorAnalysisFit(self.n_factors, loadings, psi, ll,
-                                       self.features)
+        try:
+            if self.algorithm == EM_:
+                X = self._feature_matrix(data)
+                stats = sufficient_statistics(X, gram=True)
+                loadings, ll, psi = self._estimate_em(stats, self.n_factors)
+            else:
+                X, stats = self._preprocess_data(data)
+                loadings, ll, psi = self._estimate(X, stats, self.n_factors)
+            self.model = FactorAnalysisFit(self.n_factors, loadings, psi, ll,
+                                           self.features, stats.mean)
+        finally:
+            self._unpersist()
         return X, self.model
 
     def _preprocess_data(self, data):
         X = self._feature_matrix(data)
-        n = X.count()
-        self.__means, var = column_statistics(X)
-        var = var * (n - 1) / n
-        X = RowMatrix(center(X, means=self.__means))
-        return X, self.__means, var
-
-    def _estimate(self, X, var, n_factors):
-        n, p = X.numRows(), X.numCols()
+        stats = sufficient_statistics(X)
+        X = RowMatrix(self._persist(center(X, means=stats.mean)))
+        return X, stats
+
+    def _estimate(self, X, stats, n_factors):
+        n, p = stats.n, len(stats.mean)
+        var = stats.variance(ddof=0)
         old_ll = -numpy.inf
         llconst = p * numpy.log(2. * numpy.pi) + n_factors
         psi = numpy.ones(p, dtype=numpy.float32)
@@ -78,7 +101,8 @@ class FactorAnalysis(DimensionReduction):
         logger.info("Computing factor analysis")
         for _ in range(self.max_iter):
             sqrt_psi = numpy.sqrt(psi) + self.__eps
-            s, V, unexp_var = svd(self._tilde(X, sqrt_psi, nsqrt), n_factors)
+            s, V, unexp_var = svd(self._tilde(X, sqrt_psi, nsqrt), n_factors,
+                                  self.method)
             s = s ** 2
             W = self._update_factors(s, V, sqrt_psi)
             ll = self._loglik(llconst, unexp_var, s, psi, n)
@@ -90,6 +114,52 @@ class FactorAnalysis(DimensionReduction):
 
         return W, logliks, psi
 
+    def _estimate_em(self, stats, n_factors):
+        """
+        Estimate the factors with EM (Rubin and Thayer, 1982). The only
+        pass over the data is the computation of the covariance matrix, all
+        iterations are computed on the driver from the covariance.
+        """
+
+        n, p = stats.n, len(stats.mean)
+        S = stats.covariance(ddof=0)
+        Ih = numpy.eye(n_factors)
+
+        evals, evecs = linalg.eigh(S)
+        idxs = numpy.argsort(-evals)[:n_factors]
+        L = evecs[:, idxs] * numpy.sqrt(numpy.maximum(evals[idxs], 0))
+        psi = numpy.maximum(S.diagonal() - numpy.sum(L ** 2, axis=1),
+                            self.__eps)
+        old_ll = -numpy.inf
+        logliks = []
+
+        logger.info("Computing factor analysis using EM")
+        for _ in range(self.max_iter):
+            Lpsi = L / psi[:, numpy.newaxis]
+            beta = linalg.solve(Ih + L.T.dot(Lpsi), Lpsi.T)
+            SB = S.dot(beta.T)
+            Ezz = Ih - beta.dot(L) + beta.dot(SB)
+            L = linalg.solve(Ezz, SB.T).T
+            psi = numpy.maximum(S.diagonal() - numpy.sum(L * SB, axis=1),
+                                self.__eps)
+            ll = self._gaussian_loglik(S, L, psi, n, p)
+            logliks.append(ll)
+            if abs(ll - old_ll) < self.threshold:
+                break
+            old_ll = ll
+
+        return L.T, logliks, psi
+
+    @staticmethod
+    def _gaussian_loglik(S, L, psi, n, p):
+        C = L.dot(L.T) + numpy.diag(psi)
+        _, logdet = numpy.linalg.slogdet(C)
+        ll = p * numpy.log(2. * numpy.pi) + logdet
+        ll += numpy.trace(linalg.solve(C, S, assume_a="pos"))
+        ll *= -n / 2.
+
+        return ll
+
     @staticmethod
     def _tilde(X, psi_sqrt, n_sqrt):
         norm = psi_sqrt * n_sqrt
@@ -114,11 +184,9 @@ class FactorAnalysis(DimensionReduction):
         return psi
 
     def transform(self, data):
-        X = self._feature_matrix(data)
-        X = RowMatrix(center(X, self.__means))
-        return FactorAnalysisTransform(self._transform(data, X), self.model)
+        return FactorAnalysisTransform(self._transform(data), self.model)
 
-    def _transform(self, data, X):
+    def _transform(self, data):
         logger.info("Transforming data")
         W = self.model.loadings
         psi = self.model.error_vcov
@@ -126,27 +194,14 @@ class FactorAnalysis(DimensionReduction):
         Ih = numpy.eye(len(W))
         Wpsi = W / psi
         cov_z = numpy.linalg.inv(Ih + numpy.dot(Wpsi, W.T))
-        tmp = numpy.dot(Wpsi.T, cov_z)
-        tmp_dense = DenseMatrix(numRows=tmp.shape[0], numCols=tmp.shape[1],
-                                values=tmp.flatten(), isTransposed=True)
-        X = X.multiply(tmp_dense)
-        data = join(data, X, self.spark)
-        del X
+        means = self.model.means
+        P = self._broadcast(numpy.dot(Wpsi.T, cov_z))
 
-        return data
+        return self._project(data, lambda X: (X - means).dot(P.value))
 
     def fit_transform(self, data):
-        X, _ = self._fit(data)
-        return FactorAnalysisTransform(self._transform(data, X), self.model)
-
-    @staticmethod
-    def _join(data, X):
-        X = X.withColumn("row_index", func.monotonically_increasing_id())
-        data = data.withColumn("row_index", func.monotonically_increasing_id())
-        data = data.join(X["row_index", "features"],
-                         on=["row_index"]).drop("row_index")
-
-        return data
+        self._fit(data)
+        return FactorAnalysisTransform(self._transform(data), self.model)
 
 
 @click.command()
@@ -154,7 +209,14 @@ class FactorAnalysis(DimensionReduction):
 @click.argument("file", type=str)
 @click.argument("features", type=str)
 @click.argument("outpath", type=str)
-def run(factors, file, features, outpath):
+@click.option("--method", default=AUTO_, help="SVD method to use")
+@click.option("--algorithm", default=SVD_,
+              help="Either 'svd' or 'em'")
+@output_options
+@cache_options
+@storage_options
+def run(factors, file, features, outpath, method, algorithm, fmt,
+        compression, cache_dir, storage_level):
     """
     Fit a factor analysis to a data set
     """
@@ -172,10 +234,13 @@ def run(factors, file, features, outpath):
         try:
             features = read_info(features)
             data = read_and_transmute(spark, file, features,
-                                      assemble_features=False)
-            fl = FactorAnalysis(spark, factors, features)
+                                      assemble_features=False,
+                                      cache_dir=cache_dir)
+            fl = FactorAnalysis(spark, factors, features, method=method,
+                                algorithm=algorithm,
+                                storage_level=storage_level)
             trans = fl.fit_transform(data)
-            trans.write(outpath)
+            trans.write(outpath, fmt, compression)
         except Exception as e:
             logger.error("Some error: {}".format(str(e)))
 
@@ -19,17 +19,12 @@
 # @email = 'simon.dirmeier@bsse.ethz.ch'
 
 
-import glob
 import logging
-import pathlib
-
-import pandas
 from abc import abstractmethod
 
-from pyspark.sql.functions import col
-
 from pybda.fit.predicted_data import PredictedData
-from pybda.io.io import rm
+from pybda.globals import PREDICTION__, TSV_
+from pybda.io.io import write_partitioned
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -39,25 +34,14 @@ class ClusteringTransformed(PredictedData):
     def __init__(self, data):
         super().__init__(data)
 
-    def write(self, outpath, k):
+    def write(self, outpath, k, fmt=TSV_, compression=None):
         outpath = outpath + "-transformed-K{}".format(k)
-        self.write_clusters(outpath)
+        self.write_clusters(outpath, fmt=fmt, compression=compression)
 
     @abstractmethod
-    def write_clusters(self, outpath, suff="", sort_me=True):
+    def write_clusters(self, outpath, suff="", fmt=TSV_, compression=None):
         pass
 
     @staticmethod
-    def _write_clusters(data, outpath, sort_me):
-        if sort_me:
-            data.sort(col('prediction'))
-        data.write.csv(path=outpath, sep='\t', mode='overwrite', header=True)
-        files = [x for x in glob.glob(outpath + "/*") if x.endswith(".csv")]
-        for fl in files:
-            df = pandas.read_csv(fl, sep="\t")
-            for i in df["prediction"].unique():
-                sub = df[df.prediction == i]
-                out = outpath + "/cluster_" + str(i) + ".tsv"
-                header = False if pathlib.Path(out).exists() else True
-                sub.to_csv(out, sep="\t", mode="a", header=header, index=False)
-        rm(files)
+    def _write_clusters(data, outpath, fmt, compression):
+        write_partitioned(data, outpath, PREDICTION__, fmt, compression)
@@ -19,11 +19,16 @@
 # @email = 'simon.dirmeier@bsse.ethz.ch'
 
 
+import json
 import logging
 from abc import ABC, abstractmethod
 
+import numpy
 from pandas import DataFrame
 
+from pybda.globals import (FACTOR_ANALYSIS__, FEATURES__, ICA__, KPCA__,
+                           LDA__, N_COMPONENTS__, PCA__)
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
@@ -38,6 +43,10 @@ class DimensionReductionFit(ABC):
     def loadings(self):
         return self.__loadings
 
+    @property
+    def features(self):
+        return self.__features
+
     @property
     def feature_names(self):
         return self.__features
@@ -46,10 +55,42 @@ class DimensionReductionFit(ABC):
     def n_components(self):
         return self.__n_components
 
+    @property
+    @abstractmethod
+    def kind(self):
+        pass
+
     @abstractmethod
     def write(self, outfolder):
         pass
 
+    def save(self, outfile):
+        """
+        Save the parameters of a fit such that a data set can later be
+        transformed without fitting the model again. Numeric parameters are
+        written to 'outfile-model.npz', the rest to 'outfile-model.json'.
+
+        :param outfile: the prefix of the files to write to
+        """
+
+        logger.info("Writing model to file")
+        numpy.savez_compressed(outfile + "-model.npz", **self._arrays())
+        meta = {
+            "kind": self.kind,
+            N_COMPONENTS__: int(self.n_components),
+            FEATURES__: list(self.features)
+        }
+        meta.update(self._metadata())
+        with open(outfile + "-model.json", "w") as fh:
+            json.dump(meta, fh, indent=2)
+
+    @abstractmethod
+    def _arrays(self):
+        pass
+
+    def _metadata(self):
+        return {}
+
     def _write_loadings(self, outfile):
         logger.info("Writing loadings to file")
         DataFrame(self.loadings, columns=self.feature_names).to_csv(
@@ -58,3 +99,34 @@ class DimensionReductionFit(ABC):
     @abstractmethod
     def _plot(self, outfile):
         pass
+
+
+def load(outfile):
+    """
+    Load a fit that has been written using `DimensionReductionFit.save`.
+
+    :param outfile: the prefix of the files the fit has been written to
+    :return: returns a DimensionReductionFit
+    """
+
+    from pybda.fit.factor_analysis_fit import FactorAnalysisFit
+    from pybda.fit.ica_fit import ICAFit
+    from pybda.fit.kpca_fit import KPCAFit
+    from pybda.fit.lda_fit import LDAFit
+    from pybda.fit.pca_fit import PCAFit
+
+    logger.info("Loading model from file")
+    with open(outfile + "-model.json", "r") as fh:
+        meta = json.load(fh)
+    fits = {
+        FACTOR_ANALYSIS__: FactorAnalysisFit,
+        ICA__: ICAFit,
+        KPCA__: KPCAFit,
+        LDA__: LDAFit,
+        PCA__: PCAFit
+    }
+    if meta["kind"] not in fits:
+        raise ValueError("Unknown model kind: {}".format(meta["kind"]))
+    with numpy.load(outfile + "-model.npz") as fh:
+        arrays = dict(fh.items())
+    return fits[meta["kind"]]._from_arrays(meta, arrays)
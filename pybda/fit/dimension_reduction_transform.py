@@ -22,8 +22,8 @@
 import logging
 from abc import ABC, abstractmethod
 
-from pybda.globals import FEATURES__
-from pybda.io.io import write_tsv
+from pybda.globals import FEATURES__, TSV_
+from pybda.io.io import write_data
 from pybda.spark.features import split_vector
 
 logger = logging.getLogger(__name__)
@@ -56,13 +56,13 @@ class DimensionReductionTransform(ABC):
         return self.__model
 
     @abstractmethod
-    def write(self, outfolder):
+    def write(self, outfolder, fmt=TSV_, compression=None):
         pass
 
     @abstractmethod
     def _plot(self, outfile):
         pass
 
-    def write_tsv(self, outfolder):
+    def write_data(self, outfolder, fmt=TSV_, compression=None):
         data = split_vector(self.data, FEATURES__)
-        write_tsv(data, outfolder)
+        write_data(data, outfolder, fmt, compression)
@@ -26,6 +26,7 @@ import matplotlib.pyplot as plt
 from pandas import DataFrame
 
 from pybda.fit.dimension_reduction_fit import DimensionReductionFit
+from pybda.globals import FACTOR_ANALYSIS__, FEATURES__, N_COMPONENTS__
 from pybda.io.io import mkdir
 from pybda.plot.dimension_reduction_plot import biplot, \
     plot_cumulative_variance
@@ -36,10 +37,19 @@ logger.setLevel(logging.INFO)
 
 
 class FactorAnalysisFit(DimensionReductionFit):
-    def __init__(self, n_factors, loadings, psi, ll, features):
+    def __init__(self, n_factors, loadings, psi, ll, features, means):
         super().__init__(n_factors, features, loadings)
         self.__psi = psi
         self.__ll = ll
+        self.__means = means
+
+    @property
+    def kind(self):
+        return FACTOR_ANALYSIS__
+
+    @property
+    def means(self):
+        return self.__means
 
     @property
     def n_factors(self):
@@ -54,12 +64,24 @@ class FactorAnalysisFit(DimensionReductionFit):
         return self.__ll
 
     def write(self, outfolder):
+        self.save(outfolder)
         self._write_loadings(outfolder + "-loadings.tsv")
         self._write_likelihood(outfolder + "-loglik.tsv")
         plot_fold = outfolder + "-plot"
         mkdir(plot_fold)
         self._plot(os.path.join(plot_fold, "factor_analysis"))
 
+    def _arrays(self):
+        return {
+            "loadings": self.loadings, "psi": self.error_vcov,
+            "loglikelihood": self.loglikelihood, "means": self.means
+        }
+
+    @classmethod
+    def _from_arrays(cls, meta, arrays):
+        return cls(meta[N_COMPONENTS__], arrays["loadings"], arrays["psi"],
+                   arrays["loglikelihood"], meta[FEATURES__], arrays["means"])
+
     def _write_likelihood(self, outfile):
         logger.info("Writing likelihood profile")
         DataFrame(data=self.loglikelihood).to_csv(
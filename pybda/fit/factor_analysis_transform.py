@@ -25,7 +25,7 @@ import os
 from pandas import DataFrame
 
 from pybda.fit.dimension_reduction_transform import DimensionReductionTransform
-from pybda.globals import FEATURES__
+from pybda.globals import FEATURES__, TSV_
 from pybda.io.io import mkdir
 from pybda.plot.descriptive import scatter, histogram
 from pybda.sampler import sample
@@ -52,10 +52,10 @@ class FactorAnalysisTransform(DimensionReductionTransform):
     def loglikelihood(self):
         return self.model.loglikelihood
 
-    def write(self, outfolder):
+    def write(self, outfolder, fmt=TSV_, compression=None):
         logger.info("Writing transform")
         self.model.write(outfolder)
-        self.write_tsv(outfolder)
+        self.write_data(outfolder, fmt, compression)
         plot_fold = outfolder + "-plot"
         mkdir(plot_fold)
         self._plot(os.path.join(plot_fold, "factor_analysis"))
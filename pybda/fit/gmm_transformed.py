@@ -22,8 +22,7 @@
 import logging
 
 from pybda.fit.clustering_transformed import ClusteringTransformed
-from pybda.globals import FEATURES__, RESPONSIBILITIES__
-from pybda.io.io import mkdir
+from pybda.globals import TSV_, FEATURES__, RESPONSIBILITIES__
 from pybda.spark.features import split_vector
 
 logger = logging.getLogger(__name__)
@@ -34,10 +33,9 @@ class GMMTransformed(ClusteringTransformed):
     def __init__(self, data):
         super().__init__(data)
 
-    def write_clusters(self, outpath, suff="", sort_me=True):
+    def write_clusters(self, outpath, suff="", fmt=TSV_, compression=None):
         outpath = outpath + "-components" + str(suff)
         logger.info("Writing components to: {}".format(outpath))
-        mkdir(outpath)
         data = split_vector(self.data, FEATURES__)
         data = split_vector(data, RESPONSIBILITIES__)
-        self._write_clusters(data, outpath, sort_me)
+        self._write_clusters(data, outpath, fmt, compression)
@@ -25,6 +25,7 @@ import os
 from pandas import DataFrame
 
 from pybda.fit.dimension_reduction_fit import DimensionReductionFit
+from pybda.globals import FEATURES__, ICA__, N_COMPONENTS__
 from pybda.io.io import mkdir
 from pybda.plot.dimension_reduction_plot import biplot
 
@@ -33,10 +34,20 @@ logger.setLevel(logging.INFO)
 
 
 class ICAFit(DimensionReductionFit):
-    def __init__(self, n_components, loadings, features, unmixing, whitening):
+    def __init__(self, n_components, loadings, features, unmixing, whitening,
+                 means):
         super().__init__(n_components, features, loadings.T)
         self.__unmixing = unmixing
         self.__whitening = whitening
+        self.__means = means
+
+    @property
+    def kind(self):
+        return ICA__
+
+    @property
+    def means(self):
+        return self.__means
 
     @property
     def unmixing(self):
@@ -47,11 +58,24 @@ class ICAFit(DimensionReductionFit):
         return self.__whitening
 
     def write(self, outfolder):
+        self.save(outfolder)
         self._write_loadings(outfolder + "-loadings.tsv")
         plot_fold = outfolder + "-plot"
         mkdir(plot_fold)
         self._plot(os.path.join(plot_fold, "ica"))
 
+    def _arrays(self):
+        return {
+            "loadings": self.loadings, "unmixing": self.unmixing,
+            "whitening": self.whitening, "means": self.means
+        }
+
+    @classmethod
+    def _from_arrays(cls, meta, arrays):
+        return cls(meta[N_COMPONENTS__], arrays["loadings"].T,
+                   meta[FEATURES__], arrays["unmixing"], arrays["whitening"],
+                   arrays["means"])
+
     def _plot(self, outfile):
         logger.info("Plotting")
         for suf in ["png", "pdf", "svg", "eps"]:
@@ -0,0 +1,166 @@
+# Copyright (C) 2018, 2019 Simon Dirmeier
+#
+# This file is part of pybda.
+#
+# pybda is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pybda is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pybda. If not, see <http://www.gnu.org/licenses/>.
+#
+# @author = 'Simon Dirmeier'
+# @email = 'simon.dirmeier@bsse.ethz.ch'
+
+
+import logging
+
+import numpy
+from pyspark.sql.types import IntegerType
+
+from pybda.globals import BLOCK_SIZE_, FEATURES__, PREDICTION__
+from pybda.io.io import mkdir
+from pybda.spark.dataframe import project
+from pybda.util.cast_as import as_rdd_of_blocks
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def closest_center(X, centers):
+    """
+    Compute the index of the closest center for every row of a matrix.
+
+    :param X: a (n x p) numpy array
+    :param centers: a (k x p) numpy array
+    :return: returns a vector of length n
+    """
+
+    dists = (centers ** 2).sum(axis=1) - 2 * X.dot(centers.T)
+    return numpy.argmin(dists, axis=1)
+
+
+def center_statistics(X, centers):
+    """
+    Compute the number of rows assigned to every center, their sums and
+    their squared distances to the center per feature.
+
+    :param X: a (n x p) numpy array
+    :param centers: a (k x p) numpy array
+    :return: returns a tuple of counts (k), sums (k x p) and squares (k x p)
+    """
+
+    labels = closest_center(X, centers)
+    counts = numpy.bincount(labels, minlength=centers.shape[0])
+    sums = numpy.zeros(centers.shape)
+    numpy.add.at(sums, labels, X)
+    squares = numpy.zeros(centers.shape)
+    numpy.add.at(squares, labels, (X - centers[labels]) ** 2)
+    return counts, sums, squares
+
+
+def cluster_statistics(spark, data, centers, block_size=BLOCK_SIZE_):
+    """
+    Compute cluster sizes and within-cluster squared errors per feature in a
+    single pass over the data.
+
+    :param spark: a running spark session
+    :param data: a data frame with a column of features
+    :param centers: a (k x p) numpy array
+    :param block_size: the maximal number of rows per block
+    :return: returns a tuple of counts (k) and squares (k x p)
+    """
+
+    C = spark.sparkContext.broadcast(centers)
+
+    def _seq(acc, X):
+        counts, _, squares = center_statistics(X, C.value)
+        return acc[0] + counts, acc[1] + squares
+
+    def _comb(left, right):
+        return left[0] + right[0], left[1] + right[1]
+
+    blocks = as_rdd_of_blocks(
+      data.select(FEATURES__).rdd.map(lambda r: r[0]), block_size)
+    counts, squares = blocks.treeAggregate(
+      (numpy.zeros(centers.shape[0], dtype=int), numpy.zeros(centers.shape)),
+      _seq, _comb)
+    C.unpersist()
+    return counts, squares
+
+
+class KMeansSummary:
+    def __init__(self, cluster_sizes, cluster_squares):
+        self.__cluster_sizes = [int(c) for c in cluster_sizes]
+        self.__cluster_squares = cluster_squares
+
+    @property
+    def clusterSizes(self):
+        return self.__cluster_sizes
+
+    @property
+    def clusterSquares(self):
+        return self.__cluster_squares
+
+    @property
+    def trainingCost(self):
+        return float(self.__cluster_squares.sum())
+
+
+class KMeansModel:
+    """
+    A k-means fit given by its cluster centers. Exposes the parts of the
+    interface of `pyspark.ml.clustering.KMeansModel` that are used by
+    `KMeansFit`, such that other engines than pyspark.ml can be used.
+    """
+
+    def __init__(self, spark, centers, summary):
+        self.__spark = spark
+        self.__centers = numpy.asarray(centers, dtype=numpy.float64)
+        self.__summary = summary
+
+    @classmethod
+    def of(cls, spark, data, centers):
+        centers = numpy.asarray(centers, dtype=numpy.float64)
+        counts, squares = cluster_statistics(spark, data, centers)
+        return cls(spark, centers, KMeansSummary(counts, squares))
+
+    @property
+    def summary(self):
+        return self.__summary
+
+    def clusterCenters(self):
+        return [c for c in self.__centers]
+
+    def computeCost(self, data):
+        _, squares = cluster_statistics(self.__spark, data, self.__centers)
+        return float(squares.sum())
+
+    def transform(self, data):
+        C = self.__spark.sparkContext.broadcast(self.__centers)
+        return project(data, FEATURES__,
+                       lambda X: closest_center(X, C.value), self.__spark,
+                       on=PREDICTION__, dtype=IntegerType())
+
+    def write(self):
+        return KMeansModelWriter(self)
+
+
+class KMeansModelWriter:
+    def __init__(self, model):
+        self.__model = model
+
+    def overwrite(self):
+        return self
+
+    def save(self, path):
+        mkdir(path)
+        numpy.savetxt(path + "/cluster_centers.tsv",
+                      numpy.vstack(self.__model.clusterCenters()),
+                      delimiter="\t")
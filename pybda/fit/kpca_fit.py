@@ -21,7 +21,11 @@
 
 import logging
 
+from pyspark.mllib.linalg import DenseMatrix
+
 from pybda.fit.pca_fit import PCAFit
+from pybda.globals import (FEATURES__, FOURIER_, N_COMPONENTS__, NYSTROEM_,
+                           RBF_)
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -30,16 +34,31 @@ logger.setLevel(logging.INFO)
 class KPCAFit(PCAFit):
     __KIND__ = "kpca"
 
-    def __init__(self, n_components, loadings, sds, features,
-                 n_fourier_features, fourier_coefficients, fourier_offset,
-                 gamma):
-        super().__init__(n_components, loadings, sds, features)
+    def __init__(self, n_components, loadings, sds, features, means,
+                 variances, n_fourier_features, fourier_coefficients,
+                 fourier_offset, gamma, approximation=FOURIER_,
+                 landmarks=None, normalization=None, kernel=RBF_, degree=3,
+                 coef0=1., total_variance=None):
+        super().__init__(n_components, loadings, sds, features, means,
+                         variances, total_variance=total_variance)
         self.__n_fourier_features = n_fourier_features
         self.__fourier_coefficients = fourier_coefficients
         self.__fourier_offset = fourier_offset
         self.__gamma = gamma
+        self.__approximation = approximation
+        self.__landmarks = landmarks
+        self.__normalization = normalization
+        self.__kernel = kernel
+        self.__degree = degree
+        self.__coef0 = coef0
+        prefix = "nystroem" if approximation == NYSTROEM_ else "fourier"
         self.__ff_features = list(
-          map('fourier_feature_{}'.format, range(1, n_fourier_features + 1)))
+          map((prefix + '_feature_{}').format,
+              range(1, n_fourier_features + 1)))
+
+    @property
+    def kind(self):
+        return KPCAFit.__KIND__
 
     @property
     def fourier_coefficients(self):
@@ -57,6 +76,70 @@ class KPCAFit(PCAFit):
     def n_fourier_features(self):
         return self.__n_fourier_features
 
+    @property
+    def approximation(self):
+        return self.__approximation
+
+    @property
+    def landmarks(self):
+        return self.__landmarks
+
+    @property
+    def normalization(self):
+        return self.__normalization
+
+    @property
+    def kernel(self):
+        return self.__kernel
+
+    @property
+    def degree(self):
+        return self.__degree
+
+    @property
+    def coef0(self):
+        return self.__coef0
+
     @property
     def feature_names(self):
         return self.__ff_features
+
+    def _arrays(self):
+        arrays = super()._arrays()
+        if self.approximation == NYSTROEM_:
+            arrays["landmarks"] = self.landmarks
+            arrays["normalization"] = self.normalization
+        else:
+            arrays["fourier_coefficients"] = \
+                self.fourier_coefficients.toArray()
+            arrays["fourier_offset"] = self.fourier_offset
+        return arrays
+
+    def _metadata(self):
+        meta = super()._metadata()
+        meta["n_fourier_features"] = int(self.n_fourier_features)
+        meta["gamma"] = float(self.gamma)
+        meta["approximation"] = self.approximation
+        meta["kernel"] = self.kernel
+        meta["degree"] = int(self.degree)
+        meta["coef0"] = float(self.coef0)
+        return meta
+
+    @classmethod
+    def _from_arrays(cls, meta, arrays):
+        approximation = meta.get("approximation", FOURIER_)
+        if approximation == NYSTROEM_:
+            return cls(meta[N_COMPONENTS__], arrays["loadings"],
+                       arrays["sds"], meta[FEATURES__], arrays["means"],
+                       arrays["variances"], meta["n_fourier_features"],
+                       None, None, meta["gamma"], approximation,
+                       arrays["landmarks"], arrays["normalization"],
+                       meta["kernel"], meta["degree"], meta["coef0"],
+                       meta.get("total_variance"))
+        w = arrays["fourier_coefficients"]
+        w = DenseMatrix(w.shape[0], w.shape[1], w.flatten(),
+                        isTransposed=True)
+        return cls(meta[N_COMPONENTS__], arrays["loadings"], arrays["sds"],
+                   meta[FEATURES__], arrays["means"], arrays["variances"],
+                   meta["n_fourier_features"], w, arrays["fourier_offset"],
+                   meta["gamma"], total_variance=meta.get("total_variance"))
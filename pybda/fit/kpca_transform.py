@@ -37,6 +37,14 @@ class KPCATransform(PCATransform):
     def kind(self):
         return KPCATransform.__KIND__
 
+    @property
+    def approximation(self):
+        return self.model.approximation
+
+    @property
+    def kernel(self):
+        return self.model.kernel
+
     @property
     def gamma(self):
         return self.model.gamma
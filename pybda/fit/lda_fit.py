@@ -22,9 +22,11 @@
 import logging
 import os
 
+import numpy
 from pandas import DataFrame
 
 from pybda.fit.dimension_reduction_fit import DimensionReductionFit
+from pybda.globals import FEATURES__, LDA__, N_COMPONENTS__, RESPONSE__
 from pybda.io.io import mkdir
 from pybda.plot.dimension_reduction_plot import biplot, \
     plot_cumulative_variance
@@ -35,10 +37,16 @@ logger.setLevel(logging.INFO)
 
 
 class LDAFit(DimensionReductionFit):
-    def __init__(self,  n_components, loadings, var, features, response):
+    def __init__(self,  n_components, loadings, var, features, response,
+                 total_variance=None):
         super().__init__(n_components, features, loadings)
         self.__vars = var
         self.__response = response
+        self.__total_variance = total_variance
+
+    @property
+    def kind(self):
+        return LDA__
 
     @property
     def response(self):
@@ -60,19 +68,50 @@ class LDAFit(DimensionReductionFit):
     def variances(self):
         return self.__vars
 
+    @property
+    def total_variance(self):
+        """
+        The sum of the variances of all discriminants, including the ones
+        that have not been computed.
+        """
+
+        if self.__total_variance is None:
+            return float(numpy.sum(self.variances))
+        return self.__total_variance
+
     def write(self, outfolder):
-        self._write_loadings(outfolder + "-projection.tsv")
+        self.save(outfolder)
+        self._write_projection(outfolder + "-projection.tsv")
         plot_fold = outfolder + "-plot"
         mkdir(plot_fold)
         self._plot(os.path.join(plot_fold, "linear_discriminant_analysis"))
 
+    def _write_projection(self, outfile):
+        logger.info("Writing projection to file")
+        DataFrame(self.projection.T, columns=self.feature_names).to_csv(
+          outfile, sep="\t", index=False)
+
+    def _arrays(self):
+        return {"loadings": self.loadings, "variances": self.variances}
+
+    def _metadata(self):
+        return {RESPONSE__: self.response,
+                "total_variance": float(self.total_variance)}
+
+    @classmethod
+    def _from_arrays(cls, meta, arrays):
+        return cls(meta[N_COMPONENTS__], arrays["loadings"],
+                   arrays["variances"], meta[FEATURES__], meta[RESPONSE__],
+                   meta.get("total_variance"))
+
     def _plot(self, outfile):
         logger.info("Plotting")
-        cev = normalized_cumsum(self.variances)
+        cev = normalized_cumsum(self.variances, self.total_variance)
         for suf in ["png", "pdf", "svg", "eps"]:
             plot_cumulative_variance(
                 outfile + "-discriminants-explained_variance." + suf, cev,
                 "# discriminants")
-            biplot(outfile + "-loadings-biplot." + suf,
-                   DataFrame(self.loadings, columns=self.feature_names),
-                   "Discriminant 1", "Discriminant 2")
+            if self.loadings.shape[1] > 1:
+                biplot(outfile + "-loadings-biplot." + suf,
+                       DataFrame(self.loadings.T, columns=self.feature_names),
+                       "Discriminant 1", "Discriminant 2")
@@ -23,7 +23,7 @@ import logging
 import os
 
 from pybda.fit.dimension_reduction_transform import DimensionReductionTransform
-from pybda.globals import FEATURES__
+from pybda.globals import FEATURES__, TSV_
 from pybda.io.io import mkdir
 from pybda.plot.descriptive import scatter, histogram
 from pybda.sampler import sample
@@ -58,10 +58,10 @@ class LDATransform(DimensionReductionTransform):
     def variances(self):
         return self.model.variances
 
-    def write(self, outfolder):
+    def write(self, outfolder, fmt=TSV_, compression=None):
         logger.info("Writing transform")
         self.model.write(outfolder)
-        self.write_tsv(outfolder)
+        self.write_data(outfolder, fmt, compression)
         plot_fold = outfolder + "-plot"
         mkdir(plot_fold)
         self._plot(os.path.join(plot_fold, "linear_discriminant_analysis"))
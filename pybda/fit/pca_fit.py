@@ -21,13 +21,16 @@
 import logging
 import os
 
+import numpy
 from pandas import DataFrame
 
 from pybda.fit.dimension_reduction_fit import DimensionReductionFit
+from pybda.globals import FEATURES__, N_COMPONENTS__
 from pybda.io.io import mkdir
 from pybda.plot.dimension_reduction_plot import (biplot,
                                                  plot_cumulative_variance)
-from pybda.stats.stats import cumulative_explained_variance
+from pybda.stats.stats import (SufficientStatistics,
+                               cumulative_explained_variance)
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -36,9 +39,14 @@ logger.setLevel(logging.INFO)
 class PCAFit(DimensionReductionFit):
     __KIND__ = "pca"
 
-    def __init__(self, n_components, loadings, sds, features):
+    def __init__(self, n_components, loadings, sds, features, means,
+                 variances, statistics=None, total_variance=None):
         super().__init__(n_components, features, loadings)
         self.__sds = sds
+        self.__means = means
+        self.__variances = variances
+        self.__statistics = statistics
+        self.__total_variance = total_variance
 
     @property
     def kind(self):
@@ -48,15 +56,73 @@ class PCAFit(DimensionReductionFit):
     def sds(self):
         return self.__sds
 
+    @property
+    def means(self):
+        return self.__means
+
+    @property
+    def variances(self):
+        return self.__variances
+
+    @property
+    def statistics(self):
+        return self.__statistics
+
+    @property
+    def total_variance(self):
+        """
+        The sum of the variances of all components, including the ones that
+        have not been computed by a truncated SVD.
+        """
+
+        if self.__total_variance is None:
+            return float(numpy.sum(self.sds ** 2))
+        return self.__total_variance
+
     def write(self, outfolder):
+        self.save(outfolder)
         self._write_loadings(outfolder + "-loadings.tsv")
         plot_fold = outfolder + "-plot"
         mkdir(plot_fold)
         self._plot(os.path.join(plot_fold, self.kind))
 
+    def _arrays(self):
+        arrays = {
+            "loadings": self.loadings, "sds": self.sds,
+            "means": self.means, "variances": self.variances
+        }
+        if self.statistics is not None:
+            arrays["statistics_mean"] = self.statistics.mean
+            arrays["statistics_m2"] = self.statistics.m2
+            if self.statistics.comoment is not None:
+                arrays["statistics_comoment"] = self.statistics.comoment
+        return arrays
+
+    def _metadata(self):
+        meta = {"total_variance": float(self.total_variance)}
+        if self.statistics is not None:
+            meta["statistics_n"] = int(self.statistics.n)
+        return meta
+
+    @staticmethod
+    def _statistics_from_arrays(meta, arrays):
+        if "statistics_n" not in meta:
+            return None
+        return SufficientStatistics(
+          meta["statistics_n"], arrays["statistics_mean"],
+          arrays["statistics_m2"], arrays.get("statistics_comoment"))
+
+    @classmethod
+    def _from_arrays(cls, meta, arrays):
+        return cls(meta[N_COMPONENTS__], arrays["loadings"], arrays["sds"],
+                   meta[FEATURES__], arrays["means"], arrays["variances"],
+                   cls._statistics_from_arrays(meta, arrays),
+                   meta.get("total_variance"))
+
     def _plot(self, outfile):
         logger.info("Plotting")
-        cev = cumulative_explained_variance(self.sds)
+        cev = cumulative_explained_variance(
+          self.sds, total=self.total_variance)
         for suf in ["png", "pdf", "svg", "eps"]:
             plot_cumulative_variance(
                 outfile + "-loadings-explained_variance." + suf,
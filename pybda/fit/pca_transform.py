@@ -23,7 +23,7 @@ import logging
 import os
 
 from pybda.fit.dimension_reduction_transform import DimensionReductionTransform
-from pybda.globals import FEATURES__
+from pybda.globals import FEATURES__, TSV_
 from pybda.io.io import mkdir
 from pybda.plot.descriptive import scatter, histogram
 from pybda.sampler import sample
@@ -48,10 +48,10 @@ class PCATransform(DimensionReductionTransform):
     def sds(self):
         return self.model.sds
 
-    def write(self, outfolder):
+    def write(self, outfolder, fmt=TSV_, compression=None):
         logger.info("Writing transform")
         self.model.write(outfolder)
-        self.write_tsv(outfolder)
+        self.write_data(outfolder, fmt, compression)
         plot_fold = outfolder + "-plot"
         mkdir(plot_fold)
         self._plot(os.path.join(plot_fold, self.kind))
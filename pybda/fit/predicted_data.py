@@ -21,8 +21,8 @@
 
 import logging
 
-from pybda.globals import FEATURES__, RAW_PREDICTION__, PROBABILITY__
-from pybda.io.io import write_tsv
+from pybda.globals import FEATURES__, RAW_PREDICTION__, PROBABILITY__, TSV_
+from pybda.io.io import write_data
 
 from pybda.spark.features import drop, split_vector
 
@@ -34,17 +34,19 @@ class PredictedData:
     def __init__(self, data):
         self.__data = data
 
-    def write(self, outpath):
+    def write(self, outpath, fmt=TSV_, compression=None):
         """
-        Write a transformed data set to tsv.
+        Write a transformed data set to tsv or parquet.
 
         :param outpath: the path to where the files are written.
+        :param fmt: either 'tsv' or 'parquet'
+        :param compression: an optional compression codec
         """
 
         outpath = outpath + "-predicted"
         data = drop(self.data, FEATURES__, RAW_PREDICTION__)
         data = split_vector(data, PROBABILITY__)
-        write_tsv(data, outpath)
+        write_data(data, outpath, fmt, compression)
 
     @property
     def data(self):
@@ -27,6 +27,7 @@ from pyspark.ml.regression import RandomForestRegressor
 
 from pybda.ensemble import Ensemble
 from pybda.globals import GAUSSIAN_, BINOMIAL_
+from pybda.util.options import cache_options, output_options
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -61,7 +62,10 @@ class Forest(Ensemble):
 @click.argument("family", type=str)
 @click.argument("outpath", type=str)
 @click.option("-p", "--predict", default="None")
-def run(file, meta, features, response, family, outpath, predict):
+@output_options
+@cache_options
+def run(file, meta, features, response, family, outpath, predict, fmt,
+        compression, cache_dir):
     """
     Fit a generalized linear regression model.
     """
@@ -79,15 +83,17 @@ def run(file, meta, features, response, family, outpath, predict):
     with SparkSession() as spark:
         try:
             meta, features = read_column_info(meta, features)
-            data = read_and_transmute(spark, file, features, response)
+            data = read_and_transmute(spark, file, features, response,
+                                      cache_dir=cache_dir)
             fl = Forest(spark, response, features, family)
             fit = fl.fit(data)
             fit.write(outpath)
             if pathlib.Path(predict).exists():
                 pre_data = read_and_transmute(spark, predict, features,
-                                              drop=False)
+                                              drop=False,
+                                              cache_dir=cache_dir)
                 pre_data = fit.predict(pre_data)
-                pre_data.write(outpath)
+                pre_data.write(outpath, fmt, compression)
         except Exception as e:
             logger.error("Some error: {}".format(str(e)))
 
@@ -21,51 +21,85 @@
 
 import collections
 
+ARPACK_ = "arpack"
+AUTO_ = "auto"
 BIC_ = "BIC"
 BINOMIAL_ = "binomial"
+BLOCK_SIZE_ = 10000
+CACHE_DIR__ = "cache_dir"
 CLUSTERING__ = "clustering"
+COMPRESSION__ = "compression"
 DEBUG__ = "debug"
+DEFLATION_ = "deflation"
 DIM_RED__ = "dimension_reduction"
 DOUBLE_ = "double"
+DRIVER_MEMORY_ = "1g"
+EM_ = "em"
 EXPL_VAR_ = "explained_variance"
 FACTOR_ANALYSIS__ = "factor_analysis"
+FACTOR_ANALYSIS_ALGORITHM__ = FACTOR_ANALYSIS__ + "_algorithm"
 FAMILY__ = "family"
 FEATURES__ = "features"
 FLOAT_ = "float"
 FLOAT32_ = "float64"
 FLOAT64_ = "float32"
 FOREST__ = "forest"
+FOURIER_ = "fourier"
 GAUSSIAN_ = "gaussian"
 GBM__ = "gbm"
 GLM__ = "glm"
 GMM__ = "gmm"
+GRAM_ = "gram"
+GRAM_MAX_FEATURES_ = 5000
 ICA__ = "ica"
+ICA_ALGORITHM__ = "ica_algorithm"
 INFILE__ = "infile"
 INTERCEPT__ = "intercept"
 KMEANS__ = "kmeans"
+KMEANS_METHOD__ = "kmeans_method"
+KMEANS_WARM_START__ = "kmeans_warm_start"
 KPCA__ = "kpca"
+KPCA_APPROXIMATION__ = KPCA__ + "_approximation"
+KPCA_DEGREE__ = KPCA__ + "_degree"
+KPCA_FUSED__ = "kpca_fused"
+KPCA_GAMMA__ = KPCA__ + "_gamma"
+KPCA_KERNEL__ = KPCA__ + "_kernel"
+KPCA_N_FEATURES__ = KPCA__ + "_n_features"
 LDA__ = "lda"
+LDA_SHRINKAGE__ = "lda_shrinkage"
+LINEAR_ = "linear"
+LLOYD_ = "lloyd"
 LOGLIK_ = "loglik"
 MAHA__ = "mahalanobis"
 MAX_CENTERS__ = "max_centers"
+MEMORY_AND_DISK_ = "MEMORY_AND_DISK"
 META__ = "meta"
+MINIBATCH_ = "minibatch"
 N_, P_, K_ = "n", "p", "k"
 N_CENTERS__ = "n_centers"
 N_COMPONENTS__ = "n_components"
+N_JOBS__ = "n_jobs"
 NULL_BIC_ = "null_" + BIC_
 NULL_LOGLIK_ = "null_" + LOGLIK_
+NYSTROEM_ = "nystroem"
 OUTFOLDER__ = "outfolder"
+OUTPUT_FORMAT__ = "output_format"
 OUTLIERS__ = "outliers"
+PARALLEL_ = "parallel"
+PARQUET_ = "parquet"
 PATH_ = "path"
 PCA__ = "pca"
 PLOT_FONT_ = "Tahoma"
 PLOT_FONT_FAMILY_ = 'sans-serif'
 PLOT_STYLE_ = "seaborn-whitegrid"
+POLYNOMIAL_ = "polynomial"
 PREDICT__ = "predict"
 PREDICTION__ = "prediction"
 PROBABILITY__ = "probability"
 PVAL__ = "pvalue"
+RANDOMIZED_ = "randomized"
 RAW_PREDICTION__ = "rawPrediction"
+RBF_ = "rbf"
 RED_ = "#990000"
 REGRESSION__ = "regression"
 RESPONSE__ = "response"
@@ -73,9 +107,13 @@ RESPONSIBILITIES__ = "responsibilities"
 SPARK__ = "spark"
 SPARKIP__ = SPARK__ + "ip"
 SPARKPARAMS__ = SPARK__ + "params"
+STORAGE_LEVEL__ = "storage_level"
+SVD_ = "svd"
+SVD_METHOD__ = "svd_method"
 TOTAL_VAR_ = "total_variance"
 TSV_ = "tsv"
 WITHIN_VAR_ = "within_cluster_variance"
+WRITE_INTERMEDIATE__ = "write_intermediate"
 
 CLUSTERING_INFILE__ = CLUSTERING__ + "_" + INFILE__
 DIM_RED_INFILE__ = DIM_RED__ + "_" + INFILE__
@@ -30,21 +30,24 @@ from pybda.clustering import Clustering
 from pybda.fit.gmm_fit import GMMFit
 from pybda.fit.gmm_fit_profile import GMMFitProfile
 from pybda.fit.gmm_transformed import GMMTransformed
-from pybda.globals import RESPONSIBILITIES__, GMM__, FEATURES__
+from pybda.globals import RESPONSIBILITIES__, GMM__, FEATURES__, TSV_
 from pybda.spark.dataframe import dimension
+from pybda.util.options import cache_options, output_options
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
 class GMM(Clustering):
-    def __init__(self, spark, clusters, threshold=scipy.inf, max_iter=25):
-        super().__init__(spark, clusters, threshold, max_iter, GMM__)
+    def __init__(self, spark, clusters, threshold=scipy.inf, max_iter=25,
+                 n_jobs=1):
+        super().__init__(spark, clusters, threshold, max_iter, GMM__, n_jobs)
 
     def fit(self, data, outpath=None):
+        data = data.select(FEATURES__).cache()
         n, p = dimension(data)
-        data = data.select(FEATURES__)
         self.model = self._fit(GMMFitProfile(), outpath, data, n, p, scipy.nan)
+        data.unpersist()
         return self
 
     @staticmethod
@@ -58,11 +61,11 @@ class GMM(Clustering):
                        loglik=fit.summary.logLikelihood, n=n, p=p, path=None)
         return model
 
-    def write(self, data, outpath=None):
+    def write(self, data, outpath=None, fmt=TSV_, compression=None):
         for k, fit in self.model:
             m = GMMTransformed(fit.transform(data))
             if outpath:
-                m.write(outpath, k)
+                m.write(outpath, k, fmt, compression)
 
 
 @click.command()
@@ -70,7 +73,13 @@ class GMM(Clustering):
 @click.argument("file", type=str)
 @click.argument("features", type=str)
 @click.argument("outpath", type=str)
-def run(clusters, file, features, outpath):
+@click.option("--n-jobs", default=1, type=int,
+              help="Number of mixtures to fit concurrently using FAIR "
+                   "scheduling")
+@output_options
+@cache_options
+def run(clusters, file, features, outpath, n_jobs, fmt, compression,
+        cache_dir):
     """
     Fit a gmm to a data set.
     """
@@ -84,13 +93,14 @@ def run(clusters, file, features, outpath):
     outfolder = drop_suffix(outpath, "/")
     set_logger(as_logfile(outpath))
 
-    with SparkSession() as spark:
+    with SparkSession(fair=n_jobs > 1) as spark:
         try:
             features = read_info(features)
-            data = read_and_transmute(spark, file, features)
-            fit = GMM(spark, clusters, features)
+            data = read_and_transmute(spark, file, features,
+                                      cache_dir=cache_dir)
+            fit = GMM(spark, clusters, n_jobs=n_jobs)
             fit = fit.fit(data, outfolder)
-            fit.write(data, outfolder)
+            fit.write(data, outfolder, fmt, compression)
         except Exception as e:
             logger.error("Some error: {}".format(e))
 
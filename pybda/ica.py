@@ -21,6 +21,7 @@
 import logging
 
 import click
+import numpy
 import scipy
 from pyspark.mllib.linalg import DenseMatrix
 from pyspark.mllib.linalg.distributed import RowMatrix
@@ -28,10 +29,15 @@ from pyspark.mllib.linalg.distributed import RowMatrix
 from pybda.dimension_reduction import DimensionReduction
 from pybda.fit.ica_fit import ICAFit
 from pybda.fit.ica_transform import ICATransform
-from pybda.spark.dataframe import join
+from pybda.globals import (BLOCK_SIZE_, DEFLATION_, MEMORY_AND_DISK_,
+                           PARALLEL_)
 from pybda.stats.linalg import svd, elementwise_product
 from pybda.stats.random import mtrand
-from pybda.stats.stats import center, gs_decorrelate, column_means
+from pybda.stats.stats import (center, gs_decorrelate, column_means,
+                               sym_decorrelate)
+from pybda.util.cast_as import as_rdd_of_blocks
+from pybda.util.options import (cache_options, output_options,
+                                storage_options)
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -39,9 +45,14 @@ logger.setLevel(logging.INFO)
 
 class ICA(DimensionReduction):
     def __init__(self, spark, n_components, features, max_iter=25,
-                 thresh=1e-03):
-        super().__init__(spark, features, thresh, max_iter)
+                 thresh=1e-03, algorithm=DEFLATION_,
+                 storage_level=MEMORY_AND_DISK_):
+        super().__init__(spark, features, thresh, max_iter, storage_level)
+        if algorithm not in [DEFLATION_, PARALLEL_]:
+            raise ValueError("ICA algorithm '{}' not supported".format(
+              algorithm))
         self.__n_components = n_components
+        self.__algorithm = algorithm
         self.__seed = 23
 
     @property
@@ -52,24 +63,37 @@ class ICA(DimensionReduction):
     def n_components(self):
         return self.__n_components
 
+    @property
+    def algorithm(self):
+        return self.__algorithm
+
     def fit(self, data):
         self._fit(data)
         return self
 
     def _fit(self, data):
         logger.info("Fitting ICA..")
-        X = self._preprocess_data(data)
-        W, K = self._estimate(X)
-        self.model = ICAFit(self.n_components, K.dot(W), self.features, W, K)
+        try:
+            X, means = self._preprocess_data(data)
+            W, K = self._estimate(X)
+            self.model = ICAFit(self.n_components, K.dot(W), self.features,
+                                W, K, means)
+        finally:
+            self._unpersist()
         return X, self.model
 
     def _preprocess_data(self, data):
         X = self._feature_matrix(data)
-        self.__means = column_means(X)
-        return RowMatrix(center(X, means=self.__means))
+        means = column_means(X)
+        return RowMatrix(self._persist(center(X, means=means))), means
 
     def _estimate(self, X):
-        X_white, K = self._whiten(X)
+        # the parallel algorithm persists its blocks of the whitened rows
+        # instead of the rows themselves
+        parallel = self.algorithm == PARALLEL_
+        X_white, K = self._whiten(X, persist=not parallel)
+        if parallel:
+            return self._estimate_parallel(X_white), K
         W = scipy.zeros(shape=(self.n_components, self.n_components))
         w_init = mtrand(self.n_components, self.n_components, seed=self.__seed)
 
@@ -88,12 +112,61 @@ class ICA(DimensionReduction):
 
         return W.T, K
 
-    def _whiten(self, X):
+    def _estimate_parallel(self, Xw):
+        """
+        Estimate all components at once using symmetric FastICA. Every
+        iteration updates the complete unmixing matrix from a single pass
+        over the whitened data.
+        """
+
+        blocks = self._persist(as_rdd_of_blocks(Xw.rows, BLOCK_SIZE_))
+        W = sym_decorrelate(
+          mtrand(self.n_components, self.n_components, seed=self.__seed))
+
+        logger.info("Computing independent component analysis")
+        for _ in range(self.max_iter):
+            xg, gd = self._parallel_statistics(blocks, W)
+            W_new = sym_decorrelate(xg - gd[:, numpy.newaxis] * W)
+            lim = numpy.max(numpy.abs(numpy.abs((W_new * W).sum(axis=1)) - 1))
+            W = W_new
+            if lim < self.threshold:
+                break
+
+        return W.T
+
+    def _parallel_statistics(self, blocks, W):
+        """
+        Compute E[x g(W x)]^T and E[g'(W x)] for all rows of W in one
+        treeAggregate, where g is the derivative of the 'exp' contrast.
+        """
+
+        B = self._broadcast(W.T)
+
+        def _seq(acc, X):
+            Y = X.dot(B.value)
+            e = numpy.exp(-Y ** 2 / 2.)
+            return (acc[0] + X.T.dot(Y * e),
+                    acc[1] + ((1 - Y ** 2) * e).sum(axis=0),
+                    acc[2] + X.shape[0])
+
+        def _comb(left, right):
+            return left[0] + right[0], left[1] + right[1], left[2] + right[2]
+
+        k = W.shape[0]
+        xg, gd, n = blocks.treeAggregate(
+          (numpy.zeros((k, k)), numpy.zeros(k), 0), _seq, _comb)
+        B.unpersist()
+        return xg.T / n, gd / n
+
+    def _whiten(self, X, persist=True):
         s, v, _ = svd(X, X.numCols())
         K = (v.T / s)[:, :self.n_components]
         S = K * scipy.sqrt(X.numRows())
         S = DenseMatrix(S.shape[0], S.shape[1], S.flatten(), True)
-        return X.multiply(S), K
+        X_white = X.multiply(S).rows
+        if persist:
+            X_white = self._persist(X_white)
+        return RowMatrix(X_white), K
 
     def _compute_w_row(self, Xw, w, W, idx):
         g, gd = self._exp(Xw.multiply(DenseMatrix(len(w), 1, w)))
@@ -113,21 +186,17 @@ class ICA(DimensionReduction):
         return RowMatrix(g), gm
 
     def transform(self, data):
-        X = self._feature_matrix(data)
-        X = RowMatrix(center(X, self.__means))
-        return ICATransform(self._transform(data, X), self.model)
+        return ICATransform(self._transform(data), self.model)
 
-    def _transform(self, data, X):
+    def _transform(self, data):
         logger.info("Transforming data")
-        loadings = self.model.loadings.T
-        L = DenseMatrix(numRows=loadings.shape[0], numCols=loadings.shape[1],
-                        values=loadings.flatten(), isTransposed=True)
-        data = join(data, X.multiply(L), self.spark)
-        return data
+        means = self.model.means
+        L = self._broadcast(self.model.loadings.T)
+        return self._project(data, lambda X: (X - means).dot(L.value))
 
     def fit_transform(self, data):
-        X, _ = self._fit(data)
-        return ICATransform(self._transform(data, X), self.model)
+        self._fit(data)
+        return ICATransform(self._transform(data), self.model)
 
 
 @click.command()
@@ -135,7 +204,13 @@ class ICA(DimensionReduction):
 @click.argument("file", type=str)
 @click.argument("features", type=str)
 @click.argument("outpath", type=str)
-def run(components, file, features, outpath):
+@click.option("--algorithm", default=DEFLATION_,
+              help="Either 'deflation' or 'parallel'")
+@output_options
+@cache_options
+@storage_options
+def run(components, file, features, outpath, algorithm, fmt, compression,
+        cache_dir, storage_level):
     """
     Fit a linear discriminant analysis to a data set.
     """
@@ -153,10 +228,12 @@ def run(components, file, features, outpath):
         try:
             features = read_info(features)
             data = read_and_transmute(spark, file, features,
-                                      assemble_features=False)
-            fl = ICA(spark, components, features)
+                                      assemble_features=False,
+                                      cache_dir=cache_dir)
+            fl = ICA(spark, components, features, algorithm=algorithm,
+                     storage_level=storage_level)
             trans = fl.fit_transform(data)
-            trans.write(outpath)
+            trans.write(outpath, fmt, compression)
         except Exception as e:
             logger.error("Some error: {}".format(str(e)))
 
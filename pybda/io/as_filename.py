@@ -21,6 +21,8 @@
 
 import logging
 
+from pybda.globals import PARQUET_, TSV_
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
@@ -47,3 +49,18 @@ def as_loglikfile(fl):
     else:
         ssefile = fl + "-loglik.tsv"
     return ssefile
+
+
+def as_datafile(fl, fmt=TSV_):
+    """
+    Compute the name of the data set that is written to a path prefix in
+    a given output format, i.e. 'fl.tsv' or 'fl.parquet'.
+
+    :param fl: the path prefix
+    :param fmt: either 'tsv' or 'parquet'
+    :return: returns the file name
+    """
+
+    if fmt not in [TSV_, PARQUET_]:
+        raise ValueError("Can only write tsv files or parquet folders.")
+    return fl + "." + fmt
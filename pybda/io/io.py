@@ -19,15 +19,20 @@
 # @email = 'simon.dirmeier@bsse.ethz.ch'
 
 import glob
+import hashlib
+import json
 import logging
 import os
 import pathlib
 import shutil
+import uuid
 
 import pandas
 
-from pybda.globals import TSV_
-from pybda.spark.features import to_double, fill_na, assemble
+from pybda.globals import DOUBLE_, FEATURES__, PARQUET_, TSV_
+from pybda.io.as_filename import as_datafile
+from pybda.spark.features import (assemble, feature_columns, fill_na,
+                                  to_double)
 from pybda.util.string import matches
 
 logger = logging.getLogger(__name__)
@@ -81,9 +86,67 @@ def write_tsv(data, outfile, header=True, index=False):
         shutil.rmtree(outfile)
 
 
+def write_data(data, outfile, fmt=TSV_, compression=None):
+    """
+    Write a data frame to 'outfile.tsv' or 'outfile.parquet'. Uncompressed
+    tsv is written to a single file. Compressed tsv and parquet are written
+    as one part per partition, such that all tasks write in parallel.
+    Overwrites existing files!
+
+    :param data: data frame
+    :param outfile: the path prefix where the dataframe is written to
+    :param fmt: either 'tsv' or 'parquet'
+    :param compression: an optional compression codec, e.g. 'gzip', 'snappy'
+     or 'zstd'
+    """
+
+    if fmt == TSV_ and not compression:
+        write_tsv(data, outfile)
+        return
+    outfile = as_datafile(outfile, fmt)
+    logger.info("Writing {}: {}".format(fmt, outfile))
+    writer = data.write.mode("overwrite")
+    if compression:
+        writer = writer.option("compression", compression)
+    if fmt == PARQUET_:
+        writer.parquet(outfile)
+    else:
+        writer.csv(outfile, sep="\t", header=True)
+
+
+def write_partitioned(data, outfolder, column, fmt=TSV_, compression=None):
+    """
+    Write a data frame to an outfolder with one sub-folder per value of a
+    column, i.e. 'outfolder/column=value'. Every task writes its rows
+    directly to the sub-folders, such that no data is shuffled or collected.
+    Overwrites existing files!
+
+    :param data: data frame
+    :param outfolder: the path where the dataframe is written to
+    :param column: the column by which the data is partitioned
+    :param fmt: either 'tsv' or 'parquet'
+    :param compression: an optional compression codec, e.g. 'gzip' or
+     'snappy'
+    """
+
+    logger.info("Writing {} partitioned by '{}': {}".format(
+      fmt, column, outfolder))
+    writer = data.write.partitionBy(column).mode("overwrite")
+    if compression:
+        writer = writer.option("compression", compression)
+    if fmt == PARQUET_:
+        writer.parquet(outfolder)
+    elif fmt == TSV_:
+        writer.csv(outfolder, sep="\t", header=True)
+    else:
+        raise ValueError("Can only write tsv files or parquet folders.")
+
+
 def read(spark, file_name, header=True):
     if file_name.endswith(TSV_):
         data = read_tsv(spark, file_name, header)
+    elif file_name.endswith("." + PARQUET_):
+        data = read_parquet(spark, file_name)
     elif matches(file_name, r".*/.+\..+"):
         raise ValueError("Can only parse tsv files or parquet folders.")
     elif pathlib.Path(file_name).is_dir():
@@ -94,9 +157,14 @@ def read(spark, file_name, header=True):
 
 
 def read_and_transmute(spark, file_name, feature_cols, respone=None,
-                       header=True, drop=True, assemble_features=True):
+                       header=True, drop=True, assemble_features=True,
+                       cache_dir=None):
     """
-    Reads either a 'tsv' or 'parquet' file as data frame.
+    Reads either a 'tsv' or 'parquet' file as data frame. If a 'cache_dir' is
+    given, a local tsv file is converted to parquet into that folder the first
+    time it is read and the parquet copy is used by later calls
+    (see `read_cached`). If the copy cannot be written, the tsv is read
+    directly.
 
     :param spark: a running spark session
     :type spark: pyspark.sql.SparkSession
@@ -106,10 +174,27 @@ def read_and_transmute(spark, file_name, feature_cols, respone=None,
     :param header: boolean if the tsv has a header
     :param drop: boolean if feature columns should get dropped after assembly
     :param assemble_features: assemble feature columns to a DenseVector
+    :param cache_dir: folder where parquet copies of tsv files are kept. If
+        None no copies are created
     :return: returns a tuple (DataFrame, list(str)) where the second element is
         a list of features
     """
 
+    if cache_dir and file_name.endswith(TSV_) and os.path.isfile(file_name):
+        try:
+            data = read_cached(spark, file_name, cache_dir, feature_cols,
+                               respone, header)
+        except Exception as e:
+            logger.warning("Could not cache '{}' in '{}', reading tsv: {}"
+                           .format(file_name, cache_dir, e))
+        else:
+            if assemble_features:
+                # the copy keeps the columns the vector has been assembled
+                # from, which are the 'f_' columns of a previous computation
+                return assemble(
+                  data, feature_columns(data.columns, feature_cols), drop)
+            return data.drop(FEATURES__)
+
     data = read(spark, file_name, header)
     data = to_double(data, feature_cols, respone)
     data = fill_na(data)
@@ -119,9 +204,88 @@ def read_and_transmute(spark, file_name, feature_cols, respone=None,
     return data
 
 
+def read_cached(spark, file_name, cache_dir, feature_cols, response=None,
+                header=True):
+    """
+    Reads a tsv file from its parquet copy in 'cache_dir'.
+    The copy is created the first time a file is read and contains the
+    features cast to doubles without missing values, both as single columns
+    and assembled to a vector. Copies of a tsv are kept in a folder named by
+    the hash of its absolute path. The copy itself is keyed by the size and
+    modification time of the tsv, and by the features and response: every
+    combination is stored in its own sub-folder named by the hash of these
+    values, which are also written to '_pybda.json' in the sub-folder.
+    When a new copy is created, the older copies of the same tsv are deleted.
+
+    :param spark: a running spark session
+    :type spark: pyspark.sql.SparkSession
+    :param file_name: the name of the tsv file as string
+    :param cache_dir: the folder where the parquet copies are kept
+    :param feature_cols: list of the names of the feature columns
+    :param response: the column name of the response if any
+    :param header: boolean if the tsv has a header
+    :return: returns a data frame
+    """
+
+    stat = os.stat(file_name)
+    path = os.path.abspath(file_name)
+    fingerprint = {
+        "path": path,
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "features": [str(f) for f in feature_cols],
+        "response": response,
+        "header": bool(header),
+        "dtype": DOUBLE_
+    }
+    key = hashlib.sha1(
+      json.dumps(fingerprint, sort_keys=True).encode("utf-8")).hexdigest()
+    folder = os.path.join(
+      cache_dir,
+      "{}-{}".format(parquet_data_path(os.path.basename(file_name)),
+                     hashlib.sha1(path.encode("utf-8")).hexdigest()))
+    cache = os.path.join(folder, key)
+
+    if os.path.isdir(cache):
+        logger.info("Using cached parquet: {}".format(cache))
+        return read_parquet(spark, cache)
+
+    logger.info("Caching tsv as parquet: {}".format(cache))
+    data = read(spark, file_name, header)
+    data = fill_na(to_double(data, feature_cols, response))
+    data = assemble(data, feature_cols, False)
+    # the copy is written to a temporary folder and renamed, which only
+    # succeeds if the folder does not exist yet. If another process has
+    # created the copy in the meantime, its copy is used and ours discarded
+    os.makedirs(folder, exist_ok=True)
+    tmp = "{}-{}.tmp".format(cache, uuid.uuid4().hex)
+    try:
+        write_parquet(data, tmp)
+        with open(os.path.join(tmp, "_pybda.json"), "w") as fh:
+            json.dump(fingerprint, fh)
+        os.rename(tmp, cache)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not os.path.isdir(cache):
+            raise
+        logger.info("Parquet copy has been created concurrently")
+    _remove_stale_copies(folder, key)
+    return read_parquet(spark, cache)
+
+
+def _remove_stale_copies(folder, key):
+    # temporary folders belong to concurrent writers and are left alone
+    for name in os.listdir(folder):
+        if name != key and not name.endswith(".tmp"):
+            logger.info("Removing stale parquet: {}".format(name))
+            shutil.rmtree(os.path.join(folder, name), ignore_errors=True)
+
+
 def read_tsv(spark, file_name, header='true'):
     """
-    Reads a tsv file as data frame
+    Reads a tsv file as data frame. All columns are read as strings, such
+    that a malformed value only nulls its own cell when the features are cast
+    to double afterwards, instead of the entire row.
 
     :param spark: a running spark session
     :type spark: pyspark.sql.SparkSession
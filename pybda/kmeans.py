@@ -22,47 +22,150 @@
 import logging
 
 import click
+import numpy
 import pyspark
 import pyspark.ml.clustering
+import pyspark.mllib.clustering
 
 from pybda.clustering import Clustering
 from pybda.fit.kmeans_fit import KMeansFit
 from pybda.fit.kmeans_fit_profile import KMeansFitProfile
+from pybda.fit.kmeans_model import KMeansModel
 from pybda.fit.kmeans_transformed import KMeansTransformed
-from pybda.globals import FEATURES__, KMEANS__
+from pybda.globals import FEATURES__, KMEANS__, LLOYD_, MINIBATCH_, TSV_
+from pybda.minibatch_kmeans import MiniBatchKMeans
 from pybda.spark.dataframe import dimension
-from pybda.spark.features import split_vector
+from pybda.util.options import cache_options, output_options
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
+def split_clusters(centers, sizes, squares, k):
+    """
+    Add centers to a k-means fit until there are k of them by repeatedly
+    splitting the cluster with the largest within-cluster sum of squares.
+    A cluster is split along its feature with the largest variance into two
+    centers that are sqrt(2 / pi) standard deviations away from the old
+    one, i.e. the means of the two halves of a normal distribution.
+
+    :param centers: a (k' x p) numpy array of cluster centers
+    :param sizes: the number of elements per cluster
+    :param squares: a (k' x p) numpy array of within-cluster sums of squares
+     per feature
+    :param k: the number of centers to return
+    :return: returns a (k x p) numpy array
+    """
+
+    centers = [numpy.array(c, dtype=numpy.float64) for c in centers]
+    squares = [numpy.array(s, dtype=numpy.float64) for s in squares]
+    sizes = [max(float(s), 1.) for s in sizes]
+    while len(centers) < k:
+        i = int(numpy.argmax([s.sum() for s in squares]))
+        var = squares[i] / sizes[i]
+        j = int(numpy.argmax(var))
+        offset = numpy.zeros(len(var))
+        offset[j] = numpy.sqrt(2 / numpy.pi * var[j])
+        half = squares[i] / 2
+        half[j] *= 1 - 2 / numpy.pi
+        center, size = centers[i], sizes[i] / 2
+        centers[i], squares[i], sizes[i] = center - offset, half, size
+        centers.append(center + offset)
+        squares.append(half.copy())
+        sizes.append(size)
+    return numpy.vstack(centers)
+
+
 class KMeans(Clustering):
-    def __init__(self, spark, clusters, threshold=.01, max_iter=25):
-        super().__init__(spark, clusters, threshold, max_iter, KMEANS__)
+    def __init__(self, spark, clusters, threshold=.01, max_iter=25,
+                 method=LLOYD_, fraction=.1, n_jobs=1, warm_start=False):
+        super().__init__(spark, clusters, threshold, max_iter, KMEANS__,
+                         n_jobs)
+        if method not in [LLOYD_, MINIBATCH_]:
+            raise ValueError("Unknown k-means method: {}".format(method))
+        self.__method = method
+        self.__fraction = fraction
+        self.__warm_start = warm_start
+
+    @property
+    def method(self):
+        return self.__method
+
+    @property
+    def fraction(self):
+        return self.__fraction
+
+    @property
+    def warm_start(self):
+        return self.__warm_start
 
     def fit(self, data, outpath=None):
+        data = data.select(FEATURES__).cache()
         n, p = dimension(data)
-        data = data.select(FEATURES__)
-        tot_var = self.tot_var(split_vector(data, FEATURES__), outpath)
+        tot_var = self.tot_var(data, outpath)
         self.model = self._fit(KMeansFitProfile(), outpath, data, n, p, tot_var)
+        data.unpersist()
         return self
 
-    @staticmethod
-    def _fit_one(k, data, n, p, tot_var):
+    def _fit_one(self, k, data, n, p, tot_var):
         logger.info("Clustering with K: {}".format(k))
-        km = pyspark.ml.clustering.KMeans(k=k, seed=23)
-        fit = km.fit(data)
+        if self.method == MINIBATCH_:
+            km = MiniBatchKMeans(self.spark, k, self.fraction, self.max_iter,
+                                 self.threshold)
+            fit = km.fit(data)
+            sse = fit.summary.trainingCost
+        else:
+            km = pyspark.ml.clustering.KMeans(k=k, seed=23)
+            fit = km.fit(data)
+            sse = fit.computeCost(data)
+        model = KMeansFit(data=None, fit=fit, k=k,
+                          within_cluster_variance=sse,
+                          total_variance=tot_var, n=n, p=p, path=None)
+        return model
+
+    def _fit(self, models, outpath, data, n, p, tot_var):
+        if not self.warm_start:
+            return super()._fit(models, outpath, data, n, p, tot_var)
+        fits, previous = {}, None
+        for k in sorted(self.clusters):
+            fits[k] = self._fit_warm(k, previous, data, n, p, tot_var)
+            previous = fits[k].fit
+            if outpath:
+                fits[k].write(outpath)
+        for k in self.clusters:
+            models[k] = fits[k]
+        if outpath:
+            models.write(outpath)
+        return models
+
+    def _fit_warm(self, k, previous, data, n, p, tot_var):
+        logger.info("Clustering with K: {} (warm start)".format(k))
+        centers = None
+        if previous is not None:
+            centers = split_clusters(
+              previous.clusterCenters(), previous.summary.clusterSizes,
+              previous.summary.clusterSquares, k)
+        if self.method == MINIBATCH_:
+            km = MiniBatchKMeans(self.spark, k, self.fraction, self.max_iter,
+                                 self.threshold)
+            fit = km.fit(data, centers)
+        else:
+            if centers is not None:
+                centers = pyspark.mllib.clustering.KMeansModel(list(centers))
+            fit = pyspark.mllib.clustering.KMeans.train(
+              data.rdd.map(lambda r: r[0].toArray()), k, maxIterations=20,
+              seed=23, initialModel=centers)
+            fit = KMeansModel.of(self.spark, data, fit.clusterCenters)
         model = KMeansFit(data=None, fit=fit, k=k,
-                          within_cluster_variance=fit.computeCost(data),
+                          within_cluster_variance=fit.summary.trainingCost,
                           total_variance=tot_var, n=n, p=p, path=None)
         return model
 
-    def write(self, data, outpath=None):
+    def write(self, data, outpath=None, fmt=TSV_, compression=None):
         for k, fit in self.model:
             m = KMeansTransformed(fit.transform(data))
             if outpath:
-                m.write(outpath, k)
+                m.write(outpath, k, fmt, compression)
 
 
 @click.command()
@@ -70,7 +173,17 @@ class KMeans(Clustering):
 @click.argument("file", type=str)
 @click.argument("features", type=str)
 @click.argument("outpath", type=str)
-def run(clusters, file, features, outpath):
+@click.option("--method", default=LLOYD_,
+              help="Either 'lloyd' or 'minibatch'")
+@click.option("--n-jobs", default=1, type=int,
+              help="Number of clusterings to fit concurrently using FAIR "
+                   "scheduling")
+@click.option("--warm-start", is_flag=True,
+              help="Initialize every K with the centers of the previous K")
+@output_options
+@cache_options
+def run(clusters, file, features, outpath, method, n_jobs, warm_start, fmt,
+        compression, cache_dir):
     """
     Fit a kmeans-clustering to a data set.
     """
@@ -84,13 +197,15 @@ def run(clusters, file, features, outpath):
     outfolder = drop_suffix(outpath, "/")
     set_logger(as_logfile(outpath))
 
-    with SparkSession() as spark:
+    with SparkSession(fair=n_jobs > 1) as spark:
         try:
             features = read_info(features)
-            data = read_and_transmute(spark, file, features)
-            fit = KMeans(spark, clusters, features)
+            data = read_and_transmute(spark, file, features,
+                                      cache_dir=cache_dir)
+            fit = KMeans(spark, clusters, method=method, n_jobs=n_jobs,
+                         warm_start=warm_start)
             fit = fit.fit(data, outfolder)
-            fit.write(data, outfolder)
+            fit.write(data, outfolder, fmt, compression)
         except Exception as e:
             logger.error("Some error: {}".format(e))
 
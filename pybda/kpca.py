@@ -22,23 +22,51 @@
 import logging
 
 import click
+import numpy
+from scipy import linalg
+from pyspark.mllib.linalg.distributed import RowMatrix
 from pyspark.sql import DataFrame
 
 from pybda.fit.kpca_fit import KPCAFit
 from pybda.fit.kpca_transform import KPCATransform
+from pybda.globals import (AUTO_, BLOCK_SIZE_, FOURIER_, LINEAR_,
+                           MEMORY_AND_DISK_, NYSTROEM_, POLYNOMIAL_, RBF_)
 from pybda.pca import PCA
-from pybda.stats.stats import fourier, fourier_transform
+from pybda.stats.stats import (fourier, fourier_coefficients, kernel_matrix,
+                               nystroem_features, nystroem_normalization,
+                               random_fourier_features)
+from pybda.util.cast_as import as_block, as_rdd_of_blocks
+from pybda.util.options import (cache_options, output_options,
+                                storage_options)
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
 class KPCA(PCA):
+    # maximal number of Fourier features per block when computed on the fly,
+    # i.e. 64MB of doubles
+    __MAX_BLOCK_ELEMENTS__ = 2 ** 23
+
     def __init__(self, spark, n_components, features, n_fourier_features=200,
-                 gamma=1.):
-        super().__init__(spark, n_components, features)
+                 gamma=1., method=AUTO_, fused=False, approximation=FOURIER_,
+                 kernel=RBF_, degree=3, coef0=1.,
+                 storage_level=MEMORY_AND_DISK_):
+        super().__init__(spark, n_components, features, method, storage_level)
+        if approximation not in [FOURIER_, NYSTROEM_]:
+            raise ValueError("Kernel approximation '{}' not supported".format(
+              approximation))
+        if kernel not in [RBF_, POLYNOMIAL_, LINEAR_]:
+            raise ValueError("Kernel '{}' not supported".format(kernel))
+        if approximation == FOURIER_ and kernel != RBF_:
+            raise ValueError("Random Fourier features need an RBF kernel")
         self.__n_fourier_features = n_fourier_features
         self.__gamma = gamma
+        self.__fused = fused
+        self.__approximation = approximation
+        self.__kernel = kernel
+        self.__degree = degree
+        self.__coef0 = coef0
         self.__seed = 23
 
     @property
@@ -49,28 +77,147 @@ class KPCA(PCA):
     def n_fourier_features(self):
         return self.__n_fourier_features
 
+    @property
+    def fused(self):
+        return self.__fused
+
+    @property
+    def approximation(self):
+        return self.__approximation
+
+    @property
+    def kernel(self):
+        return self.__kernel
+
+    @property
+    def degree(self):
+        return self.__degree
+
+    @property
+    def coef0(self):
+        return self.__coef0
+
     def _fit(self, data):
         logger.info("Fitting KPCA")
-        X = self._preprocess_data(data)
-        X, w, b = fourier(X, self.n_fourier_features, self.__seed, self.gamma)
-        loadings, sds = PCA._compute_pcs(X)
+        try:
+            return self._fit_kernel(data)
+        finally:
+            self._unpersist()
+
+    def _fit_kernel(self, data):
+        # the scaled data are only read more than once by the Nystroem
+        # approximation, i.e. to sample the landmarks and to aggregate the
+        # kernel features. Fourier features are computed in a single pass
+        X = self._preprocess_data(data, self.approximation == NYSTROEM_)
+        if self.approximation == NYSTROEM_:
+            return self._fit_nystroem(X)
+        if self.fused:
+            w, b = fourier_coefficients(X.numCols(), self.n_fourier_features,
+                                        self.__seed, self.gamma)
+            W = self._broadcast(w.toArray())
+            loadings, sds = self._compute_fused_pcs(
+              X, lambda Y: random_fourier_features(Y, W.value, b))
+            total = None
+            W.unpersist()
+        else:
+            X, w, b = fourier(X, self.n_fourier_features, self.__seed,
+                              self.gamma)
+            X = RowMatrix(self._persist(X.rows))
+            loadings, sds, total = self._compute_pcs(X, self.statistics.n)
         self.model = KPCAFit(self.n_components, loadings, sds, self.features,
-                             self.n_fourier_features, w, b, self.gamma)
+                             self.statistics.mean,
+                             self.statistics.variance(ddof=0),
+                             self.n_fourier_features, w, b, self.gamma,
+                             total_variance=total)
         return X, self.model
 
+    def _fit_nystroem(self, X):
+        """
+        Fit a kernel PCA using a Nystroem approximation of the kernel matrix.
+        A sample of 'n_fourier_features' rows is used as landmarks.
+        """
+
+        logger.info("Sampling Nystroem landmarks")
+        landmarks = as_block(X.rows.takeSample(
+          False, self.n_fourier_features, self.__seed))
+        kernel, gamma = self.kernel, self.gamma
+        degree, coef0 = self.degree, self.coef0
+        normalization = nystroem_normalization(kernel_matrix(
+          landmarks, landmarks, kernel, gamma, degree, coef0))
+
+        L = self._broadcast(landmarks)
+        N = self._broadcast(normalization)
+        loadings, sds = self._compute_fused_pcs(
+          X, lambda Y: nystroem_features(Y, L.value, N.value, kernel, gamma,
+                                         degree, coef0))
+        L.unpersist()
+        N.unpersist()
+
+        self.model = KPCAFit(self.n_components, loadings, sds, self.features,
+                             self.statistics.mean,
+                             self.statistics.variance(ddof=0),
+                             landmarks.shape[0], None, None, self.gamma,
+                             NYSTROEM_, landmarks, normalization, kernel,
+                             degree, coef0)
+        return X, self.model
+
+    def _compute_fused_pcs(self, X, fn):
+        """
+        Compute the principal components of kernel features from their
+        (D x D) Gram matrix. The features are computed blockwise by 'fn'
+        within the aggregation and never stored.
+        """
+
+        logger.info("Computing Gram matrix of kernel features")
+
+        def _seq(acc, Y):
+            Z = fn(Y)
+            return acc + Z.T.dot(Z)
+
+        G = as_rdd_of_blocks(X.rows, self._block_size()).treeAggregate(
+          0., _seq, lambda acc, other: acc + other)
+
+        evals, evecs = linalg.eigh(G)
+        idxs = numpy.argsort(-evals)
+        sds = numpy.sqrt(numpy.maximum(evals[idxs], 0))
+        sds = sds / numpy.sqrt(max(1, self.statistics.n - 1))
+        return evecs[:, idxs].T, sds
+
+    def _block_size(self):
+        return int(max(1, min(
+          BLOCK_SIZE_,
+          KPCA.__MAX_BLOCK_ELEMENTS__ // self.n_fourier_features)))
+
     def transform(self, data):
-        X = self._setup_matrix_for_transform(data)
-        X = fourier_transform(X,
-                              self.model.fourier_coefficients,
-                              self.model.fourier_offset)
-        return KPCATransform(self._transform(data, X), self.model)
+        return KPCATransform(self._transform(data), self.model)
+
+    def _transform(self, data):
+        logger.info("Transforming data")
+        return self._project(data, self._projection(), self._block_size())
+
+    def _projection(self):
+        scale = self._scaling()
+        L = self._broadcast(self.model.loadings[:self.n_components].T)
+        if self.model.approximation == NYSTROEM_:
+            return self._nystroem_projection(scale, L)
+        w = self._broadcast(self.model.fourier_coefficients.toArray())
+        b = self.model.fourier_offset
+        return lambda X: random_fourier_features(
+          scale(X), w.value, b).dot(L.value)
 
-    def _transform(self, data, X):
-        return super()._transform(data, X)
+    def _nystroem_projection(self, scale, L):
+        model = self.model
+        kernel, gamma = model.kernel, model.gamma
+        degree, coef0 = model.degree, model.coef0
+        landmarks = self._broadcast(model.landmarks)
+        N = self._broadcast(model.normalization)
+        return lambda X: nystroem_features(
+          scale(X), landmarks.value, N.value, kernel, gamma, degree,
+          coef0).dot(L.value)
 
     def fit_transform(self, data: DataFrame):
-        X, _ = self._fit(data)
-        return KPCATransform(self._transform(data, X), self.model)
+        self._fit(data)
+        return KPCATransform(self._transform(data), self.model)
 
 
 @click.command()
@@ -78,7 +225,27 @@ class KPCA(PCA):
 @click.argument("file", type=str)
 @click.argument("features", type=str)
 @click.argument("outpath", type=str)
-def run(components, file, features, outpath):
+@click.option("--method", default=AUTO_, help="SVD method to use")
+@click.option("--fused", is_flag=True,
+              help="Compute the Fourier features on the fly without storing "
+                   "them")
+@click.option("--approximation", default=FOURIER_,
+              help="Kernel approximation, either 'fourier' or 'nystroem'")
+@click.option("--kernel", default=RBF_,
+              help="Kernel of a Nystroem approximation, either 'rbf', "
+                   "'polynomial' or 'linear'")
+@click.option("--n-features", default=200,
+              help="Number of Fourier features or Nystroem landmarks")
+@click.option("--gamma", default=1.,
+              help="Bandwidth of the RBF kernel or scale of the polynomial "
+                   "kernel")
+@click.option("--degree", default=3, help="Degree of the polynomial kernel")
+@output_options
+@cache_options
+@storage_options
+def run(components, file, features, outpath, method, fused, approximation,
+        kernel, n_features, gamma, degree, fmt, compression, cache_dir,
+        storage_level):
     """
     Fit a kernel PCA to a data set.
     """
@@ -96,10 +263,13 @@ def run(components, file, features, outpath):
         try:
             features = read_info(features)
             data = read_and_transmute(spark, file, features,
-                                      assemble_features=False)
-            fl = KPCA(spark, components, features)
+                                      assemble_features=False,
+                                      cache_dir=cache_dir)
+            fl = KPCA(spark, components, features, n_features, gamma,
+                      method, fused, approximation, kernel, degree,
+                      storage_level=storage_level)
             tran = fl.fit_transform(data)
-            tran.write(outpath)
+            tran.write(outpath, fmt, compression)
         except Exception as e:
             logger.error("Some error: {}".format(str(e)))
 
@@ -22,26 +22,33 @@
 import logging
 
 import click
+import numpy
 import scipy
-from pyspark.mllib.linalg import DenseMatrix
-from pyspark.mllib.linalg.distributed import RowMatrix
+from scipy import linalg
 
 from pybda.dimension_reduction import DimensionReduction
 from pybda.fit.lda_fit import LDAFit
 from pybda.fit.lda_transform import LDATransform
-from pybda.spark.dataframe import join
-from pybda.spark.features import distinct
-from pybda.stats.stats import within_group_scatter, covariance_matrix
+from pybda.globals import MEMORY_AND_DISK_
+from pybda.stats.stats import (between_group_scatter,
+                               grouped_sufficient_statistics,
+                               within_group_scatter)
+from pybda.util.options import (cache_options, output_options,
+                                storage_options)
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
 class LDA(DimensionReduction):
-    def __init__(self, spark, n_components, features, response):
-        super().__init__(spark, features, scipy.inf, scipy.inf)
+    def __init__(self, spark, n_components, features, response, shrinkage=0.,
+                 storage_level=MEMORY_AND_DISK_):
+        super().__init__(spark, features, scipy.inf, scipy.inf, storage_level)
+        if not 0 <= shrinkage <= 1:
+            raise ValueError("'shrinkage' needs to be in [0, 1]")
         self.__n_components = n_components
         self.__response = response
+        self.__shrinkage = shrinkage
 
     @property
     def response(self):
@@ -51,31 +58,61 @@ class LDA(DimensionReduction):
     def n_components(self):
         return self.__n_components
 
+    @property
+    def shrinkage(self):
+        return self.__shrinkage
+
     def fit(self, data):
         self._fit(data)
         return self
 
     def _fit(self, data):
         logger.info("Running LDA ...")
-        targets = distinct(data, self.__response)
-        SW = within_group_scatter(data, self.features, self.response, targets)
-        SB = covariance_matrix(self._row_matrix(data)) * (data.count() - 1) - SW
-        loadings, var = self._compute_eigens(SW, SB)
+        groups = grouped_sufficient_statistics(data, self.features,
+                                               self.response)
+        SW = within_group_scatter(groups)
+        SB = between_group_scatter(groups)
+        loadings, var, total = self._compute_eigens(SW, SB)
         self.model = LDAFit(self.n_components, loadings, var,
-                            self.features, self.response)
+                            self.features, self.response, total)
         return self.model
 
-    def _row_matrix(self, data):
-        return RowMatrix(self._feature_matrix(data))
+    def _compute_eigens(self, SW, SB):
+        """
+        Solve the symmetric generalized eigenproblem SB v = lambda SW v for
+        the first 'n_components' discriminants. To regularize the problem,
+        the total and within-group scatter can be shrunk towards a multiple
+        of the identity, the between-group scatter being their difference.
+        Besides the first eigenvalues, the sum of all of them is returned,
+        i.e. the trace of SW^-1 SB, which the explained variance of the
+        discriminants is relative to.
+        """
 
-    @staticmethod
-    def _compute_eigens(SW, SB):
         logger.info("Computing eigen values")
-        evals, evec = scipy.linalg.eig(scipy.linalg.inv(SW).dot(SB))
-        evals = scipy.absolute(scipy.real(evals))
-        sorted_idxs = scipy.argsort(-abs(evals))
-        evals, evec = evals[sorted_idxs], evec[:, sorted_idxs]
-        return evec, evals
+        p = SW.shape[0]
+        if self.shrinkage > 0:
+            SW, SB = self._shrink(SW), self._shrink(SB)
+        total = max(numpy.trace(linalg.solve(SW, SB, assume_a="pos")), 0)
+        k = min(self.n_components, p)
+        evals, evec = self._eigh(SB, SW, p - k, p - 1)
+        sorted_idxs = numpy.argsort(-evals)
+        evals = numpy.maximum(evals[sorted_idxs], 0)
+        evec = evec[:, sorted_idxs]
+        evec /= numpy.linalg.norm(evec, axis=0)
+        return evec, evals, total
+
+    def _shrink(self, S):
+        p = S.shape[0]
+        return (1 - self.shrinkage) * S + \
+            self.shrinkage * numpy.trace(S) / p * numpy.eye(p)
+
+    @staticmethod
+    def _eigh(A, B, lo, hi):
+        try:
+            return linalg.eigh(A, B, subset_by_index=[lo, hi])
+        except TypeError:
+            # scipy < 1.5
+            return linalg.eigh(A, B, eigvals=(lo, hi))
 
     def transform(self, data):
         return LDATransform(self._transform(data), self.model)
@@ -83,12 +120,8 @@ class LDA(DimensionReduction):
     def _transform(self, data):
         logger.info("Transforming data")
         W = self.model.loadings[:, :self.n_components]
-        W = DenseMatrix(numRows=W.shape[0], numCols=W.shape[1],
-                        isTransposed=True, values=W.flatten())
-        X = self._row_matrix(data).multiply(W)
-        data = join(data, X, self.spark)
-        del X
-        return data
+        W = self._broadcast(W)
+        return self._project(data, lambda X: X.dot(W.value))
 
     def fit_transform(self, data):
         self._fit(data)
@@ -101,7 +134,14 @@ class LDA(DimensionReduction):
 @click.argument("features", type=str)
 @click.argument("response", type=str)
 @click.argument("outpath", type=str)
-def run(discriminants, file, features, response, outpath):
+@click.option("--shrinkage", default=0., type=float,
+              help="Shrinkage of the total and within-group scatter, "
+                   "in [0, 1]")
+@output_options
+@cache_options
+@storage_options
+def run(discriminants, file, features, response, outpath, shrinkage, fmt,
+        compression, cache_dir, storage_level):
     """
     Fit a linear discriminant analysis to a data set.
     """
@@ -119,10 +159,12 @@ def run(discriminants, file, features, response, outpath):
         try:
             features = read_info(features)
             data = read_and_transmute(spark, file, features,
-                                      assemble_features=False)
-            fl = LDA(spark, discriminants, features, response)
+                                      assemble_features=False,
+                                      cache_dir=cache_dir)
+            fl = LDA(spark, discriminants, features, response, shrinkage,
+                     storage_level)
             trans = fl.fit_transform(data)
-            trans.write(outpath)
+            trans.write(outpath, fmt, compression)
         except Exception as e:
             logger.error("Some error: {}".format(str(e)))
 
@@ -0,0 +1,185 @@
+# Copyright (C) 2018, 2019 Simon Dirmeier
+#
+# This file is part of pybda.
+#
+# pybda is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pybda is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pybda. If not, see <http://www.gnu.org/licenses/>.
+#
+# @author = 'Simon Dirmeier'
+# @email = 'simon.dirmeier@bsse.ethz.ch'
+
+
+import logging
+import math
+
+import numpy
+
+from pybda.fit.kmeans_model import (KMeansModel, KMeansSummary,
+                                    center_statistics)
+from pybda.globals import BLOCK_SIZE_, FEATURES__
+from pybda.util.cast_as import as_rdd_of_blocks
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def kmeans_plus_plus(X, k, random_state):
+    """
+    Choose initial centers from the rows of a matrix using k-means++.
+
+    :param X: a (n x p) numpy array
+    :param k: the number of centers
+    :param random_state: a numpy RandomState
+    :return: returns a (k x p) numpy array
+    """
+
+    if X.shape[0] < k:
+        raise ValueError(
+          "Need at least {} rows to initialize centers".format(k))
+    idxs = [random_state.randint(X.shape[0])]
+    dists = ((X - X[idxs[0]]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        tot = dists.sum()
+        if tot > 0:
+            idx = random_state.choice(X.shape[0], p=dists / tot)
+        else:
+            idx = random_state.randint(X.shape[0])
+        idxs.append(idx)
+        dists = numpy.minimum(dists, ((X - X[idx]) ** 2).sum(axis=1))
+    return X[idxs].copy()
+
+
+class MiniBatchKMeans:
+    """
+    Mini-batch k-means (Sculley, 2010) on Spark data frames.
+
+    Every iteration only reads a random subset of the partitions of the
+    data, assigns its rows to the closest centers and moves each center
+    towards the mean of its assigned rows with a per-center learning rate
+    of 'rows in this batch / rows seen so far'. Iterations stop when no
+    center moves further than 'threshold' or after 'max_iter' batches.
+    """
+
+    def __init__(self, spark, k, fraction=.1, max_iter=100, threshold=1e-4,
+                 seed=23, block_size=BLOCK_SIZE_):
+        self.__spark = spark
+        self.__k = k
+        self.__fraction = fraction
+        self.__max_iter = max_iter
+        self.__threshold = threshold
+        self.__seed = seed
+        self.__block_size = block_size
+
+    @property
+    def k(self):
+        return self.__k
+
+    @property
+    def fraction(self):
+        return self.__fraction
+
+    def fit(self, data, initial_centers=None):
+        """
+        Fit a mini-batch k-means.
+
+        :param data: a data frame with a column of features
+        :param initial_centers: an optional (k x p) numpy array of centers
+         to start from. Centers are initialized using k-means++ on a sample
+         of the data otherwise
+        :return: returns a KMeansModel
+        """
+
+        random_state = numpy.random.RandomState(self.__seed)
+        blocks = as_rdd_of_blocks(
+          data.select(FEATURES__).rdd.map(lambda r: r[0]),
+          self.__block_size).cache()
+
+        n_partitions = blocks.getNumPartitions()
+        n_batch = min(n_partitions,
+                      max(1, int(math.ceil(self.fraction * n_partitions))))
+        logger.info("Using %d of %d partitions per batch",
+                    n_batch, n_partitions)
+
+        if initial_centers is None:
+            centers = self._initialize(blocks, n_partitions, n_batch,
+                                       random_state)
+        else:
+            centers = numpy.array(initial_centers, dtype=numpy.float64)
+        seen = numpy.zeros(self.k)
+        for i in range(self.__max_iter):
+            partitions = random_state.choice(
+              n_partitions, n_batch, replace=False)
+            counts, sums = self._batch_statistics(blocks, centers, partitions)
+            seen += counts
+            idx = counts > 0
+            step = (sums[idx] - counts[idx, None] * centers[idx]) / \
+                seen[idx, None]
+            centers[idx] += step
+            shift = numpy.sqrt((step ** 2).sum(axis=1)).max() \
+                if step.size else 0
+            logger.info("\titeration %d, maximal center shift %f", i, shift)
+            if shift < self.__threshold:
+                break
+
+        counts, squares = self._statistics(blocks, centers)
+        blocks.unpersist()
+        return KMeansModel(self.__spark, centers,
+                           KMeansSummary(counts, squares))
+
+    def _initialize(self, blocks, n_partitions, n_batch, random_state):
+        partitions = random_state.choice(n_partitions, n_batch, replace=False)
+        n_sample = max(100 * self.k, self.__block_size) // n_batch + 1
+        seed = random_state.randint(2 ** 31)
+
+        def _sample(it):
+            rs = numpy.random.RandomState(seed)
+            for X in it:
+                m = min(X.shape[0], n_sample)
+                yield X[rs.choice(X.shape[0], m, replace=False)]
+
+        X = self.__spark.sparkContext.runJob(
+          blocks, _sample, partitions=[int(p) for p in partitions])
+        return kmeans_plus_plus(numpy.vstack(X), self.k, random_state)
+
+    def _batch_statistics(self, blocks, centers, partitions):
+        C = self.__spark.sparkContext.broadcast(centers)
+
+        def _statistics(it):
+            for X in it:
+                yield center_statistics(X, C.value)[:2]
+
+        stats = self.__spark.sparkContext.runJob(
+          blocks, _statistics, partitions=[int(p) for p in partitions])
+        C.unpersist()
+        counts = numpy.zeros(centers.shape[0])
+        sums = numpy.zeros(centers.shape)
+        for c, s in stats:
+            counts += c
+            sums += s
+        return counts, sums
+
+    def _statistics(self, blocks, centers):
+        C = self.__spark.sparkContext.broadcast(centers)
+
+        def _seq(acc, X):
+            counts, _, squares = center_statistics(X, C.value)
+            return acc[0] + counts, acc[1] + squares
+
+        def _comb(left, right):
+            return left[0] + right[0], left[1] + right[1]
+
+        counts, squares = blocks.treeAggregate(
+          (numpy.zeros(centers.shape[0], dtype=int),
+           numpy.zeros(centers.shape)), _seq, _comb)
+        C.unpersist()
+        return counts, squares
@@ -22,14 +22,14 @@
 import logging
 
 import click
-import scipy
-from pyspark.mllib.linalg.distributed import RowMatrix
-from pyspark.sql.functions import udf, col
+import numpy
 from pyspark.sql.types import DoubleType
 
+from pybda.globals import FEATURES__
+from pybda.spark.dataframe import project
 from pybda.spark_model import SparkModel
 from pybda.util.cast_as import as_rdd_of_array
-from pybda.stats.stats import center, chisquare, precision
+from pybda.stats.stats import chisquare, sufficient_statistics
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -50,7 +50,7 @@ class Outliers(SparkModel):
         logger.info("Removing outliers..")
         pres = self._precision(data)
 
-        data = data.withColumn("maha", self._mahalanobis(col("features"), pres))
+        data = self._mahalanobis(data, pres)
 
         quant = chisquare(pres, self.__pvalue)
         n = data.count()
@@ -60,21 +60,21 @@ class Outliers(SparkModel):
 
         return data
 
-    @staticmethod
-    def _mahalanobis(column, prec):
-        def maha_(v):
-            arr = v.toArray()
-            arr = scipy.sqrt(arr.dot(prec).dot(arr))
-            return float(arr)
+    def _mahalanobis(self, data, prec):
+        P = self.spark.sparkContext.broadcast(prec)
+
+        def maha_(X):
+            return numpy.sqrt(numpy.sum(X.dot(P.value) * X, axis=1))
 
-        return udf(maha_, DoubleType())(column)
+        return project(data, FEATURES__, maha_, self.spark,
+                       on="maha", dtype=DoubleType())
 
     @staticmethod
     def _precision(data):
         logger.info("Computing precision")
-        X = as_rdd_of_array(data.select("features"))
-        X = RowMatrix(center(X))
-        pres = precision(X)
+        X = as_rdd_of_array(data.select(FEATURES__))
+        stats = sufficient_statistics(X, gram=True)
+        pres = numpy.linalg.inv(stats.covariance())
         return pres
 
 
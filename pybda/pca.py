@@ -22,79 +22,152 @@
 import logging
 
 import click
+import numpy
 import pyspark
 import scipy
-from pyspark.mllib.linalg import DenseMatrix
+from scipy import linalg
 from pyspark.mllib.linalg.distributed import RowMatrix
 
 from pybda.dimension_reduction import DimensionReduction
+from pybda.globals import AUTO_, MEMORY_AND_DISK_, RANDOMIZED_
 from pybda.fit.pca_fit import PCAFit
 from pybda.fit.pca_transform import PCATransform
-from pybda.spark.dataframe import join
 from pybda.stats.linalg import svd
-from pybda.stats.stats import scale
+from pybda.stats.stats import scale, sufficient_statistics
+from pybda.util.options import (cache_options, output_options,
+                                storage_options)
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
 class PCA(DimensionReduction):
-    def __init__(self, spark, n_components, features):
-        super().__init__(spark, features, scipy.inf, scipy.inf)
+    def __init__(self, spark, n_components, features, method=AUTO_,
+                 storage_level=MEMORY_AND_DISK_):
+        super().__init__(spark, features, scipy.inf, scipy.inf, storage_level)
         self.__n_components = n_components
+        self.__method = method
+        self.__statistics = None
 
     @property
     def n_components(self):
         return self.__n_components
 
+    @property
+    def method(self):
+        return self.__method
+
+    @property
+    def statistics(self):
+        return self.__statistics
+
     def fit(self, data):
         self._fit(data)
         return self
 
     def _fit(self, data):
         logger.info("Fitting PCA")
-        X = self._preprocess_data(data)
-        loadings, sds = self._compute_pcs(X)
-        self.model = PCAFit(self.n_components, loadings, sds, self.features)
+        try:
+            X = self._preprocess_data(data)
+            loadings, sds, total = self._compute_pcs(X, self.statistics.n)
+            self.model = PCAFit(self.n_components, loadings, sds,
+                                self.features, self.statistics.mean,
+                                self.statistics.variance(ddof=0),
+                                total_variance=total)
+        finally:
+            self._unpersist()
         return X, self.model
 
-    def _preprocess_data(self, data):
+    def partial_fit(self, data):
+        """
+        Update a PCA with a new batch of data. The model keeps the running
+        sufficient statistics of all batches it has seen, i.e. the number of
+        rows, means, variances and the Gram matrix, such that the loadings can
+        be updated from the new batch only, without reading previous
+        batches again.
+
+        :param data: a data frame
+        :return: returns self
+        """
+
+        logger.info("Updating PCA")
+        stats = sufficient_statistics(self._feature_matrix(data), gram=True)
+        if self.model is not None:
+            if self.model.statistics is None or \
+                    self.model.statistics.comoment is None:
+                raise ValueError("PCA has not been fit with 'partial_fit'")
+            stats = self.model.statistics + stats
+        self.__statistics = stats
+        loadings, sds = self._compute_pcs_from_statistics(stats)
+        self.model = PCAFit(self.n_components, loadings, sds, self.features,
+                            stats.mean, stats.variance(ddof=0), stats)
+        return self
+
+    @staticmethod
+    def _compute_pcs_from_statistics(stats):
+        sd = numpy.sqrt(stats.variance(ddof=0))
+        evals, evecs = linalg.eigh(stats.scatter() / numpy.outer(sd, sd))
+        idxs = numpy.argsort(-evals)
+        sds = numpy.sqrt(numpy.maximum(evals[idxs], 0) / max(1, stats.n - 1))
+        return evecs[:, idxs].T, sds
+
+    def _preprocess_data(self, data, persist=True):
+        """
+        Scale the feature matrix of a data set and compute its sufficient
+        statistics.
+
+        :param data: a data frame or a RowMatrix
+        :param persist: persist the scaled matrix, i.e. if it is read more
+         than once afterwards
+        :return: returns a RowMatrix
+        """
+
         if isinstance(data, pyspark.sql.DataFrame):
             X = self._feature_matrix(data)
         else:
             X = data.rows
-        X, self.__means, self.__vars = scale(X)
+        self.__statistics = sufficient_statistics(X)
+        X, _, _ = scale(
+          X, self.statistics.mean, self.statistics.variance(ddof=0))
+        if persist:
+            X = self._persist(X)
         return RowMatrix(X)
 
-    @staticmethod
-    def _compute_pcs(X):
-        sds, loadings, _ = svd(X)
-        sds = sds / scipy.sqrt(max(1, X.numRows() - 1))
-        return loadings, sds
-
-    def _setup_matrix_for_transform(self, data):
-        X, _, _ = scale(self._feature_matrix(data), self.__means, self.__vars)
-        X = RowMatrix(X)
-        return X
+    def _compute_pcs(self, X, n):
+        """
+        Compute the loadings and standard deviations of the principal
+        components, and the total variance of the data which, for a
+        truncated SVD, includes the variance of the components that have not
+        been computed.
+        """
+
+        k = self.n_components if self.method == RANDOMIZED_ else None
+        s, loadings, var = svd(X, k, self.method)
+        # without 'k' 'var' is the variance of all components, otherwise the
+        # variance of the ones that have not been computed
+        total = var if k is None else scipy.dot(s, s) + var
+        sds = s / scipy.sqrt(max(1, n - 1))
+        return loadings, sds, total / max(1, n - 1)
 
     def transform(self, data):
-        X = self._setup_matrix_for_transform(data)
-        return PCATransform(self._transform(data, X), self.model)
+        return PCATransform(self._transform(data), self.model)
 
-    def _transform(self, data, X):
+    def _transform(self, data):
         logger.info("Transforming data")
-        loadings = self.model.loadings[:self.n_components]
-        loadings = DenseMatrix(X.numCols(),
-                               self.n_components,
-                               loadings.flatten())
-        X = X.multiply(loadings)
-        data = join(data, X, self.spark)
-        del X
-        return data
+        return self._project(data, self._projection())
+
+    def _projection(self):
+        scale = self._scaling()
+        L = self._broadcast(self.model.loadings[:self.n_components].T)
+        return lambda X: scale(X).dot(L.value)
+
+    def _scaling(self):
+        means, sd = self.model.means, numpy.sqrt(self.model.variances)
+        return lambda X: (X - means) / sd
 
     def fit_transform(self, data):
-        X, _ = self._fit(data)
-        return PCATransform(self._transform(data, X), self.model)
+        self._fit(data)
+        return PCATransform(self._transform(data), self.model)
 
 
 @click.command()
@@ -102,7 +175,12 @@ class PCA(DimensionReduction):
 @click.argument("file", type=str)
 @click.argument("features", type=str)
 @click.argument("outpath", type=str)
-def run(components, file, features, outpath):
+@click.option("--method", default=AUTO_, help="SVD method to use")
+@output_options
+@cache_options
+@storage_options
+def run(components, file, features, outpath, method, fmt, compression,
+        cache_dir, storage_level):
     """
     Fit a PCA to a data set.
     """
@@ -120,10 +198,11 @@ def run(components, file, features, outpath):
         try:
             features = read_info(features)
             data = read_and_transmute(
-              spark, file, features, assemble_features=False)
-            fl = PCA(spark, components, features)
+              spark, file, features, assemble_features=False,
+              cache_dir=cache_dir)
+            fl = PCA(spark, components, features, method, storage_level)
             trans = fl.fit_transform(data)
-            trans.write(outpath)
+            trans.write(outpath, fmt, compression)
         except Exception as e:
             logger.error("Some error: {}".format(str(e)))
 
@@ -0,0 +1,263 @@
+# Copyright (C) 2018, 2019 Simon Dirmeier
+#
+# This file is part of pybda.
+#
+# pybda is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pybda is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pybda. If not, see <http://www.gnu.org/licenses/>.
+#
+# @author = 'Simon Dirmeier'
+# @email = 'simon.dirmeier@bsse.ethz.ch'
+
+
+import logging
+import os
+import pathlib
+
+import click
+from pyspark import StorageLevel
+
+from pybda.globals import (
+    AUTO_, CACHE_DIR__, CLUSTERING__, COMPRESSION__, DEFLATION_, DIM_RED__,
+    FACTOR_ANALYSIS__, FACTOR_ANALYSIS_ALGORITHM__, FAMILY__, FEATURES__,
+    FOREST__, FOURIER_, GBM__, GLM__, GMM__, ICA__, ICA_ALGORITHM__, INFILE__,
+    KMEANS__, KMEANS_METHOD__, KMEANS_WARM_START__, KPCA__,
+    KPCA_APPROXIMATION__, KPCA_DEGREE__, KPCA_FUSED__, KPCA_GAMMA__,
+    KPCA_KERNEL__, KPCA_N_FEATURES__, LDA__, LDA_SHRINKAGE__, LLOYD_,
+    MEMORY_AND_DISK_, N_CENTERS__, N_COMPONENTS__, N_JOBS__, OUTFOLDER__,
+    OUTLIERS__, OUTPUT_FORMAT__, PCA__, PREDICT__, PVAL__, RBF_, REGRESSION__,
+    RESPONSE__, STORAGE_LEVEL__, SVD_, SVD_METHOD__, TSV_,
+    WRITE_INTERMEDIATE__)
+from pybda.io.io import read_and_transmute, read_info, write_parquet
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class Pipeline:
+    """
+    Execute all methods of a config within one spark application.
+
+    Walks the rule tree of a PyBDAConfig, i.e. outliers/dimension reduction
+    followed by clustering, and regression, and hands the data of a method
+    to its children as a persisted data frame instead of writing it to disk
+    and submitting a new application that reads it again. Results of the
+    methods at the leaves of the tree are always written. The data of
+    intermediate methods is only written if 'write_intermediate' is set in
+    the config, their fits are written in any case.
+    """
+
+    def __init__(self, spark, config):
+        self.__spark = spark
+        self.__config = config
+        self.__features = read_info(config[FEATURES__])
+        self.__fmt = config[OUTPUT_FORMAT__] or TSV_
+        self.__compression = config[COMPRESSION__] or None
+        self.__cache_dir = config[CACHE_DIR__] or None
+        self.__write_intermediate = \
+            str(config[WRITE_INTERMEDIATE__]).lower() == "true"
+
+    @property
+    def spark(self):
+        return self.__spark
+
+    @property
+    def features(self):
+        return self.__features
+
+    def run(self):
+        for node in self.__config.tree.root.children:
+            self._run(node, None)
+
+    def _run(self, node, data):
+        logger.info("Running method '%s' (%s)", node.method, node.algorithm)
+        if data is None:
+            data = self._read(node.method)
+        outpath = os.path.join(self.__config[OUTFOLDER__], node.algorithm)
+        is_leaf = len(node.children) == 0
+
+        data = self._execute(node, data, outpath,
+                             is_leaf or self.__write_intermediate)
+        if is_leaf:
+            return
+
+        data = data.persist(StorageLevel.MEMORY_AND_DISK)
+        for child in node.children:
+            self._run(child, data)
+        data.unpersist()
+
+    def _read(self, method):
+        infile = self.__config[INFILE__]
+        if method == DIM_RED__:
+            return read_and_transmute(self.spark, infile, self.features,
+                                      assemble_features=False,
+                                      cache_dir=self.__cache_dir)
+        if method == REGRESSION__:
+            return read_and_transmute(self.spark, infile, self.features,
+                                      self.__config[RESPONSE__],
+                                      cache_dir=self.__cache_dir)
+        return read_and_transmute(self.spark, infile, self.features,
+                                  cache_dir=self.__cache_dir)
+
+    def _execute(self, node, data, outpath, write):
+        if node.method == DIM_RED__:
+            return self._dimension_reduction(node.algorithm, data, outpath,
+                                             write)
+        if node.method == OUTLIERS__:
+            return self._outliers(data, outpath, write)
+        if node.method == CLUSTERING__:
+            return self._clustering(node.algorithm, data, outpath)
+        if node.method == REGRESSION__:
+            return self._regression(node.algorithm, data, outpath)
+        raise ValueError("Unknown method: {}".format(node.method))
+
+    def _dimension_reduction(self, algorithm, data, outpath, write):
+        from pybda.factor_analysis import FactorAnalysis
+        from pybda.ica import ICA
+        from pybda.kpca import KPCA
+        from pybda.lda import LDA
+        from pybda.pca import PCA
+
+        n = int(self.__config[N_COMPONENTS__])
+        method = self.__config[SVD_METHOD__] or AUTO_
+        if algorithm == PCA__:
+            fit = PCA(self.spark, n, self.features, method)
+        elif algorithm == KPCA__:
+            config = self.__config
+            fit = KPCA(
+              self.spark, n, self.features,
+              int(config[KPCA_N_FEATURES__] or 200),
+              float(config[KPCA_GAMMA__] or 1.), method,
+              str(config[KPCA_FUSED__]).lower() == "true",
+              config[KPCA_APPROXIMATION__] or FOURIER_,
+              config[KPCA_KERNEL__] or RBF_,
+              int(config[KPCA_DEGREE__] or 3))
+        elif algorithm == FACTOR_ANALYSIS__:
+            fit = FactorAnalysis(
+              self.spark, n, self.features, method=method,
+              algorithm=self.__config[FACTOR_ANALYSIS_ALGORITHM__] or SVD_)
+        elif algorithm == ICA__:
+            fit = ICA(self.spark, n, self.features,
+                      algorithm=self.__config[ICA_ALGORITHM__] or DEFLATION_)
+        elif algorithm == LDA__:
+            fit = LDA(self.spark, n, self.features, self.__config[RESPONSE__],
+                      float(self.__config[LDA_SHRINKAGE__] or 0.))
+        else:
+            raise ValueError("Unknown dimension reduction: {}".format(
+              algorithm))
+
+        fit.storage_level = self.__config[STORAGE_LEVEL__] or MEMORY_AND_DISK_
+        trans = fit.fit_transform(data)
+        if write:
+            trans.write(outpath, self.__fmt, self.__compression)
+        else:
+            trans.model.write(outpath)
+        return trans.data
+
+    def _outliers(self, data, outpath, write):
+        from pybda.outliers import Outliers
+
+        pval = float(self.__config[PVAL__] or 0.05)
+        data = Outliers(self.spark, pval).fit_transform(data)
+        if write:
+            write_parquet(data, outpath)
+        return data
+
+    def _clustering(self, algorithm, data, outpath):
+        from pybda.gmm import GMM
+        from pybda.kmeans import KMeans
+
+        clusters = str(self.__config[N_CENTERS__]).replace(" ", "")
+        n_jobs = n_jobs_of(self.__config)
+        if algorithm == KMEANS__:
+            fit = KMeans(
+              self.spark, clusters,
+              method=self.__config[KMEANS_METHOD__] or LLOYD_,
+              n_jobs=n_jobs,
+              warm_start=str(
+                self.__config[KMEANS_WARM_START__]).lower() == "true")
+        elif algorithm == GMM__:
+            fit = GMM(self.spark, clusters, n_jobs=n_jobs)
+        else:
+            raise ValueError("Unknown clustering: {}".format(algorithm))
+
+        fit = fit.fit(data, outpath)
+        fit.write(data, outpath, self.__fmt, self.__compression)
+
+    def _regression(self, algorithm, data, outpath):
+        from pybda.forest import Forest
+        from pybda.gbm import GBM
+        from pybda.glm import GLM
+
+        if algorithm == GLM__:
+            regression = GLM
+        elif algorithm == FOREST__:
+            regression = Forest
+        elif algorithm == GBM__:
+            regression = GBM
+        else:
+            raise ValueError("Unknown regression: {}".format(algorithm))
+
+        response = self.__config[RESPONSE__]
+        fit = regression(self.spark, response, self.features,
+                         self.__config[FAMILY__])
+        fit = fit.fit(data)
+        fit.write(outpath)
+
+        predict = self.__config[PREDICT__]
+        if predict and pathlib.Path(predict).exists():
+            pre_data = read_and_transmute(self.spark, predict, self.features,
+                                          drop=False,
+                                          cache_dir=self.__cache_dir)
+            pre_data = fit.predict(pre_data)
+            pre_data.write(outpath, self.__fmt, self.__compression)
+
+
+def n_jobs_of(config):
+    """
+    Get the number of clusterings that are fit concurrently from a config.
+
+    :param config: a PyBDAConfig
+    :return: returns an int
+    """
+
+    return int(config[N_JOBS__] or 1)
+
+
+@click.command()
+@click.argument("config", type=str)
+def run(config):
+    """
+    Run all methods of a CONFIG in a single spark application.
+    """
+
+    import yaml
+    from pybda import PyBDAConfig
+    from pybda.io.as_filename import as_logfile
+    from pybda.io.io import mkdir
+    from pybda.logger import set_logger
+    from pybda.spark_session import SparkSession
+
+    with open(config, "r") as fh:
+        config = PyBDAConfig(yaml.load(fh))
+    mkdir(config[OUTFOLDER__])
+    set_logger(as_logfile(os.path.join(config[OUTFOLDER__], "pipeline")))
+
+    with SparkSession(fair=n_jobs_of(config) > 1) as spark:
+        try:
+            Pipeline(spark, config).run()
+        except Exception as e:
+            logger.error("Some error: {}".format(str(e)))
+
+
+if __name__ == "__main__":
+    run()
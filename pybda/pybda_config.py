@@ -23,7 +23,7 @@ import sys
 
 from pybda.config.rule_tree import RuleTree
 from pybda.globals import REQUIRED_ARGS__, INFILE__, OUTFOLDER__, METHODS__, \
-    DEBUG__
+    DEBUG__, OUTPUT_FORMAT__, TSV_
 
 sys.excepthook = lambda ex, msg, _: print("{}: {}".format(ex.__name__, msg))
 
@@ -40,7 +40,8 @@ class PyBDAConfig:
         for key, value in config.items():
             setattr(self, key, value)
         self.__tree = RuleTree(
-            getattr(self, INFILE__), getattr(self, OUTFOLDER__))
+            getattr(self, INFILE__), getattr(self, OUTFOLDER__),
+            getattr(self, OUTPUT_FORMAT__, TSV_))
         self.__check_required_args()
         self.__check_available_method()
         self.__set_filenames()
@@ -56,6 +57,10 @@ class PyBDAConfig:
     def __contains__(self, item):
         return hasattr(self, item)
 
+    @property
+    def tree(self):
+        return self.__tree
+
     def __check_required_args(self):
         for el in REQUIRED_ARGS__:
             if not hasattr(self, el):
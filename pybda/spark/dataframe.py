@@ -21,31 +21,101 @@
 
 import logging
 
+import numpy
 import pyspark.sql.functions as func
 from pyspark import sql
-from pyspark.ml.linalg import VectorUDT
+from pyspark.ml.linalg import VectorUDT, DenseVector
 from pyspark.mllib.linalg.distributed import RowMatrix
-from pyspark.sql.functions import udf
-from pybda.globals import FEATURES__
+from pyspark.sql.types import StructType, StructField, IntegerType
+
+from pybda.globals import FEATURES__, BLOCK_SIZE_
 from pybda.spark.features import n_features
+from pybda.util.cast_as import as_chunks
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
 def join(data: sql.DataFrame, X: RowMatrix, spark, on=FEATURES__):
-    as_ml = udf(lambda v: v.asML() if v is not None else None, VectorUDT())
+    """
+    Append the rows of a projected matrix as a vector column to a data frame.
 
-    X = spark.createDataFrame(X.rows.map(lambda x: (x,)))
-    X = X.withColumnRenamed("_1", on)
-    X = X.withColumn(on, as_ml(on))
+    The rows of X need to be derived from data through narrow transformations
+    only (e.g. '_feature_matrix' and 'RowMatrix.multiply'), such that both
+    have the same partitioning and the same number of rows per partition.
+    Rows are then matched by zipping partitions instead of joining on a
+    generated index, which avoids a shuffle and keeps the row order intact.
+
+    :param data: a data frame
+    :param X: a RowMatrix computed from data
+    :param spark: a running spark session
+    :param on: the name of the new column
+    :return: returns data with X as new column
+    """
+
+    if on in data.columns:
+        data = data.drop(on)
+    schema = StructType(data.schema.fields + [StructField(on, VectorUDT())])
+    rows = data.rdd.zip(X.rows).map(
+      lambda x: tuple(x[0]) + (x[1].asML() if x[1] is not None else None,))
+
+    return spark.createDataFrame(rows, schema)
+
+
+def project(data: sql.DataFrame, features, fn, spark, on=FEATURES__,
+            dtype=VectorUDT(), block_size=BLOCK_SIZE_):
+    """
+    Apply a function to the feature matrix of a data frame block by block and
+    append the result as a new column.
+
+    Every partition is stacked into (block_size x p) numpy arrays, such that
+    'fn' can use a single matrix product per block instead of working on
+    every row separately. Large operands of 'fn', e.g. loadings, should be
+    broadcast beforehand. Since no rows are moved between partitions the
+    output keeps the order of the input.
+
+    :param data: a data frame
+    :param features: either a list of column names or the name of a vector
+     column
+    :param fn: a function that maps a (n x p) numpy array either to a (n x q)
+     array or to a vector of length n
+    :param spark: a running spark session
+    :param on: the name of the new column. Replaces the column if it exists
+    :param dtype: the spark type of the new column
+    :param block_size: the maximal number of rows per block
+    :return: returns data with the result of fn as new column
+    """
+
+    columns = data.columns
+    if isinstance(features, str):
+        idx = columns.index(features)
+
+        def as_row(r):
+            return r[idx].toArray()
+    else:
+        idxs = [columns.index(c) for c in features]
+
+        def as_row(r):
+            return [r[i] for i in idxs]
+
+    if isinstance(dtype, VectorUDT):
+        as_value = DenseVector
+    elif isinstance(dtype, IntegerType):
+        as_value = int
+    else:
+        as_value = float
+
+    fields = data.schema.fields
+    keep = [i for i, f in enumerate(fields) if f.name != on]
+    schema = StructType([fields[i] for i in keep] + [StructField(on, dtype)])
 
-    ri = "row_index"
-    X = X.withColumn(ri, func.monotonically_increasing_id())
-    data = data.withColumn(ri, func.monotonically_increasing_id())
-    data = data.join(X[ri, on], on=[ri]).drop(ri)
+    def _project(rows):
+        for chunk in as_chunks(rows, block_size):
+            X = numpy.array([as_row(r) for r in chunk], dtype=numpy.float64)
+            for r, y in zip(chunk, fn(X)):
+                yield tuple(r[i] for i in keep) + (as_value(y),)
 
-    return data
+    return spark.createDataFrame(data.rdd.mapPartitions(_project), schema)
 
 
 def as_df(X: RowMatrix, spark):
@@ -23,16 +23,24 @@ import scipy
 
 import pyspark.sql
 from pyspark.ml.feature import VectorAssembler
-from pyspark.rdd import reduce
 from pyspark.sql.functions import col
 
-from pybda.globals import FLOAT_, FLOAT64_, FEATURES__
+from pybda.globals import DOUBLE_, FLOAT64_, FEATURES__
 from pybda.util.cast_as import as_array
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
+def _column(name):
+    """
+    Reference a column by its literal name, such that names containing dots
+    are not resolved as nested fields.
+    """
+
+    return col("`{}`".format(name.replace("`", "``")))
+
+
 def fill_na(data, what=0):
     """
     Fill NA elements of a data frame with a value.
@@ -45,6 +53,22 @@ def fill_na(data, what=0):
     return data.fillna(what)
 
 
+def feature_columns(columns, feature_cols):
+    """
+    Get the feature columns of a data set. Columns with prefix 'f_' from a
+    previous computation are preferred over the provided feature names.
+
+    :param columns: the column names of a data set
+    :param feature_cols: the names of the features
+    :return: returns a list of column names
+    """
+
+    f_cols = list(filter(lambda x: x.startswith("f_"), columns))
+    if len(f_cols):
+        return f_cols
+    return feature_cols
+
+
 def to_double(data, feature_cols, response=None):
     """
     Convert columns to double.
@@ -69,7 +93,7 @@ def to_double(data, feature_cols, response=None):
             raise TypeError("'features' column ist not if type float")
         has_feature_col = True
 
-    f_cols = list(filter(lambda x: x.startswith("f_"), cols))
+    f_cols = feature_columns(cols, [])
     if len(f_cols):
         logger.info(
             "Found columns with prefix f_ from previous computation: {}.\n"
@@ -84,14 +108,17 @@ def to_double(data, feature_cols, response=None):
                            "AND a separate column '{}'".format(x))
         if x not in column_types.keys():
             raise ValueError("Couldn't find column '{}' in DataFrame".format(x))
-        if column_types[x] != FLOAT_:
-            data = data.withColumn(x, data[x].cast("float"))
 
-    if response:
-        if column_types[response] != FLOAT_:
-            data = data.withColumn(response, data[response].cast("float"))
+    casts = [x for x in feature_cols if column_types[x] != DOUBLE_]
+    if response and column_types[response] != DOUBLE_:
+        casts.append(response)
+    if not casts:
+        return data
 
-    return data
+    casts = set(casts)
+    return data.select(
+      [_column(x).cast(DOUBLE_).alias(x) if x in casts else _column(x)
+       for x in cols])
 
 
 def assemble(data, feature_cols, drop=True):
@@ -107,25 +134,32 @@ def assemble(data, feature_cols, drop=True):
     """
 
     cols = data.columns
-    if FEATURES__ not in cols:
-        logger.info("Assembling column to feature vector")
-        f_cols = list(filter(lambda x: x.startswith("f_"), cols))
-        if len(f_cols):
-            logger.info(
-                "Found columns with prefix f_ from previous computation: {}. "
-                "Preferring these columns as features"
-                "".format("\t".join(f_cols)))
-            feature_cols = f_cols
-        assembler = VectorAssembler(inputCols=feature_cols,
-                                    outputCol=FEATURES__)
-        data = assembler.transform(data)
-    else:
+    if FEATURES__ in cols:
         logger.info("Features already assembled")
+        if drop:
+            logger.info("Dropping redundant columns")
+            data = data.drop(*feature_cols)
+        return data
+
+    logger.info("Assembling column to feature vector")
+    f_cols = feature_columns(cols, [])
+    if len(f_cols):
+        logger.info(
+            "Found columns with prefix f_ from previous computation: {}. "
+            "Preferring these columns as features"
+            "".format("\t".join(f_cols)))
+        feature_cols = f_cols
+    keep = cols
     if drop:
         logger.info("Dropping redundant columns")
-        data = data.drop(*feature_cols)
+        dropped = set(feature_cols)
+        keep = [x for x in cols if x not in dropped]
 
-    return data
+    # the assembler appends its vector with a single projection over '*',
+    # selecting the columns we keep on top of it collapses both into one
+    assembler = VectorAssembler(inputCols=feature_cols, outputCol=FEATURES__)
+    return assembler.transform(data).select(
+      [_column(x) for x in keep] + [col(FEATURES__)])
 
 
 def drop(data, *columns):
@@ -154,9 +188,8 @@ def replace_column_names(data, fro=".", to="_"):
     old_cols = data.columns
     new_cols = list(map(lambda x: x.replace(fro, to), old_cols))
 
-    data = reduce(
-        lambda d, idx: d.withColumnRenamed(old_cols[idx], new_cols[idx]),
-        range(len(new_cols)), data)
+    data = data.select(
+      [_column(o).alias(n) for o, n in zip(old_cols, new_cols)])
 
     return data, new_cols
 
@@ -179,14 +212,10 @@ def split_vector(data, col_name):
     cols.remove(col_name)
     initial = col_name[0]
     len_vec = len(data.select(col_name).take(1)[0][0])
-    data = (data.withColumn(initial, as_array(
-        col(col_name))).select(cols + [col(initial)[i]
-                                       for i in range(len_vec)]))
-
-    for _, x in enumerate(data.columns):
-        if x.startswith(initial + "["):
-            data = data.withColumnRenamed(x,
-                                          x.replace("[", "_").replace("]", ""))
+    arr = as_array(_column(col_name))
+    data = data.select(
+      [_column(x) for x in cols] +
+      [arr[i].alias("{}_{}".format(initial, i)) for i in range(len_vec)])
 
     return data
 
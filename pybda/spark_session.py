@@ -29,12 +29,22 @@ logger.setLevel(logging.INFO)
 
 
 class SparkSession:
-    def __init__(self):
-        pyspark.StorageLevel(True, True, False, False, 2)
+    def __init__(self, fair=False):
+        """
+        :param fair: use FAIR scheduling, e.g. when several jobs are
+         submitted concurrently from driver threads, unless the application
+         has been started with another 'spark.scheduler.mode'
+        """
+
+        self.__fair = fair
 
     def __enter__(self):
         logger.info("Initializing pyspark session")
-        spark = pyspark.sql.SparkSession.builder.getOrCreate()
+        builder = pyspark.sql.SparkSession.builder
+        if self.__fair and \
+                not pyspark.SparkConf().contains("spark.scheduler.mode"):
+            builder = builder.config("spark.scheduler.mode", "FAIR")
+        spark = builder.getOrCreate()
         for conf in spark.sparkContext.getConf().getAll():
             logger.info("Config: %s, value: %s", conf[0], conf[1])
 
@@ -21,30 +21,53 @@
 
 import logging
 
+import numpy
 import scipy
+from scipy import linalg
 from pyspark.mllib.linalg.distributed import RowMatrix
 
-from pybda.spark.dataframe import as_df_with_idx
+from pybda.globals import (ARPACK_, AUTO_, BLOCK_SIZE_, DRIVER_MEMORY_,
+                           GRAM_, GRAM_MAX_FEATURES_, RANDOMIZED_)
+from pybda.stats.random import mtrand
+from pybda.stats.stats import sufficient_statistics
+from pybda.util.cast_as import as_rdd_of_blocks
+from pybda.util.string import as_bytes
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
-def svd(data: RowMatrix, n_components=None):
+def svd(data: RowMatrix, n_components=None, method=AUTO_):
     """
     Computes a singular value decomposition on a data matrix and the variance
     that is explained by the first n_components.
 
+    For tall and skinny matrices the decomposition can be computed from the
+    eigen decomposition of the Gram matrix, which needs only a single pass
+    over the data, instead of using 'RowMatrix.computeSVD'.
+
     :param data: a data frame
     :param n_components: number of components to be returned
+    :param method: either 'gram', 'arpack', 'randomized' or 'auto'. If 'auto'
+     the Gram matrix is used if it fits comfortably into driver memory.
+     'randomized' only computes the first n_components
     :return: returns the estimated components of a SVD.
     :rtype: a triple of (s, V, var)
     """
 
-    logger.info("Computing SVD")
-    svd = data.computeSVD(data.numCols(), computeU=False)
-    s = svd.s.toArray()
-    V = svd.V.toArray().T
+    if method == RANDOMIZED_:
+        return randomized_svd(data, n_components)
+    if method == AUTO_:
+        method = _svd_method(data)
+    logger.info("Computing SVD using method '%s'", method)
+    if method == GRAM_:
+        s, V = _gram_svd(data)
+    elif method == ARPACK_:
+        svd = data.computeSVD(data.numCols(), computeU=False)
+        s = svd.s.toArray()
+        V = svd.V.toArray().T
+    else:
+        raise ValueError("SVD method '{}' not supported".format(method))
     var = scipy.dot(s, s)
     if n_components is not None:
         var = scipy.dot(s[n_components:], s[n_components:])
@@ -52,10 +75,86 @@ def svd(data: RowMatrix, n_components=None):
     return s, V, var
 
 
+def _svd_method(data: RowMatrix):
+    conf = data.rows.context.getConf()
+    return _svd_method_for(
+      data.numCols(), conf.get("spark.driver.memory", DRIVER_MEMORY_))
+
+
+def _svd_method_for(p, driver_memory):
+    memory = as_bytes(driver_memory)
+    # the Gram matrix, its eigenvectors and LAPACK workspace
+    needed = 3 * p * p * numpy.dtype(numpy.float64).itemsize
+    if p <= GRAM_MAX_FEATURES_ and needed < memory / 4:
+        return GRAM_
+    return ARPACK_
+
+
+def _gram_svd(data: RowMatrix):
+    G = sufficient_statistics(data.rows, gram=True).gram
+    evals, evecs = linalg.eigh(G)
+    idxs = numpy.argsort(-evals)
+    s = numpy.sqrt(numpy.maximum(evals[idxs], 0))
+    return s, evecs[:, idxs].T
+
+
+def randomized_svd(data: RowMatrix, n_components, n_oversamples=10,
+                   n_iter=2, seed=23):
+    """
+    Computes a truncated singular value decomposition using a randomized
+    range finder (Halko et al., 2011). The range of the right singular
+    vectors is approximated by power iterations on the Gram matrix, each of
+    which is a single distributed pass computing X^T (X Q) blockwise.
+
+    :param data: a row matrix
+    :param n_components: number of components to be returned
+    :param n_oversamples: number of additional random vectors
+    :param n_iter: number of power iterations
+    :param seed: seed of the random test matrix
+    :return: returns the estimated components of a SVD.
+    :rtype: a triple of (s, V, var)
+    """
+
+    if n_components is None:
+        raise ValueError("Randomized SVD requires 'n_components'")
+    logger.info("Computing randomized SVD")
+    p = data.numCols()
+    n_random = min(n_components + n_oversamples, p)
+
+    Z, total_var = _gram_product(data, mtrand(n_random, p, seed))
+    for _ in range(n_iter):
+        Z, _ = _gram_product(data, linalg.qr(Z, mode="economic")[0])
+    Q = linalg.qr(Z, mode="economic")[0]
+
+    evals, evecs = linalg.eigh(Q.T.dot(_gram_product(data, Q)[0]))
+    idxs = numpy.argsort(-evals)[:n_components]
+    s = numpy.sqrt(numpy.maximum(evals[idxs], 0))
+    V = Q.dot(evecs[:, idxs]).T
+    var = max(total_var - scipy.dot(s, s), 0)
+    return s, V, var
+
+
+def _gram_product(data: RowMatrix, Q):
+    """
+    Computes X^T X Q and the squared Frobenius norm of X in a single pass.
+    """
+
+    B = data.rows.context.broadcast(Q)
+    XtXQ, norm = as_rdd_of_blocks(data.rows, BLOCK_SIZE_).treeAggregate(
+      (0., 0.),
+      lambda acc, X: (acc[0] + X.T.dot(X.dot(B.value)),
+                      acc[1] + numpy.sum(X ** 2)),
+      lambda acc, other: (acc[0] + other[0], acc[1] + other[1]))
+    B.unpersist()
+    return XtXQ, norm
+
+
 def elementwise_product(X: RowMatrix, Y: RowMatrix, spark):
-    X = as_df_with_idx(X, "idx", spark)
-    Y = as_df_with_idx(Y, "idx", spark)
-    Y = Y.withColumnRenamed("_1", "_2")
-    X = X.join(Y, on="idx").drop("idx")
-    X = X.rdd.map(lambda x: scipy.array(x[0]) * scipy.array(x[1]))
-    return X
+    """
+    Computes the elementwise product of two row matrices. Y needs to be
+    derived from X by narrow transformations, such that rows can be matched
+    by zipping partitions.
+    """
+
+    return X.rows.zip(Y.rows).map(
+      lambda x: scipy.array(x[0]) * scipy.array(x[1]))
@@ -30,19 +30,127 @@ from pyspark.mllib.linalg import DenseMatrix
 from pyspark.mllib.linalg.distributed import RowMatrix
 from pyspark.mllib.stat import Statistics
 
-from pybda.util.cast_as import as_rdd_of_array
+from pybda.globals import BLOCK_SIZE_, LINEAR_, POLYNOMIAL_, RBF_
+from pybda.util.cast_as import as_chunks, as_rdd_of_array, as_rdd_of_blocks
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
 def group_mean(data: pyspark.sql.DataFrame, groups, response, features):
-    means = scipy.zeros((len(groups), len(features)))
-    for i, target in enumerate(groups):
-        df_t = data.filter("{} == {}".format(response, target))
-        X_t = df_t.select(features).rdd.map(numpy.array)
-        means[i, :] = column_means(X_t)
-    return means
+    stats = grouped_sufficient_statistics(data, features, response)
+    return numpy.array([stats[target].mean for target in groups])
+
+
+class SufficientStatistics:
+    """
+    Sufficient statistics of a data matrix, i.e. the number of rows, the
+    column sums, the column sums of squares and optionally the Gram matrix.
+    Statistics of disjoint sets of rows can be merged using '+'.
+
+    Internally the statistics are kept as means and centered (co-)moments,
+    which are merged pairwise to avoid cancellation when computing variances.
+    """
+
+    def __init__(self, n, mean, m2, comoment=None):
+        self.__n = n
+        self.__mean = mean
+        self.__m2 = m2
+        self.__comoment = comoment
+
+    def __add__(self, other):
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            return other
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        mean = self.mean + delta * other.n / n
+        m2 = self.m2 + other.m2 + delta ** 2 * self.n * other.n / n
+        comoment = None
+        if self.comoment is not None and other.comoment is not None:
+            comoment = self.comoment + other.comoment + \
+                numpy.outer(delta, delta) * self.n * other.n / n
+        return SufficientStatistics(n, mean, m2, comoment)
+
+    @classmethod
+    def of(cls, X, gram=False):
+        """
+        Compute the sufficient statistics of a numpy array.
+
+        :param X: a (n x p) numpy array
+        :param gram: boolean if the Gram matrix should be computed
+        :return: returns the sufficient statistics of X
+        """
+
+        mean = X.mean(axis=0)
+        Xc = X - mean
+        return SufficientStatistics(X.shape[0], mean, (Xc ** 2).sum(axis=0),
+                                    Xc.T.dot(Xc) if gram else None)
+
+    @property
+    def n(self):
+        return self.__n
+
+    @property
+    def mean(self):
+        return self.__mean
+
+    @property
+    def m2(self):
+        return self.__m2
+
+    @property
+    def comoment(self):
+        return self.__comoment
+
+    @property
+    def sums(self):
+        return self.n * self.mean
+
+    @property
+    def sums_of_squares(self):
+        return self.m2 + self.n * self.mean ** 2
+
+    @property
+    def gram(self):
+        if self.comoment is None:
+            return None
+        return self.comoment + self.n * numpy.outer(self.mean, self.mean)
+
+    def variance(self, ddof=1):
+        return self.m2 / (self.n - ddof)
+
+    def sum_of_squared_errors(self):
+        return float(numpy.sum(self.m2))
+
+    def scatter(self):
+        if self.comoment is None:
+            raise ValueError("Sufficient statistics have no Gram matrix")
+        return self.comoment
+
+    def covariance(self, ddof=1):
+        return self.scatter() / (self.n - ddof)
+
+
+def sufficient_statistics(data: pyspark.rdd.RDD, gram=False, depth=2):
+    """
+    Compute the number of rows, column sums, column sums of squares and
+    optionally the Gram matrix of an RDD in a single pass over the data.
+
+    :param data: an RDD of numpy arrays or spark vectors
+    :param gram: boolean if the Gram matrix should be computed
+    :param depth: the depth of the aggregation tree
+    :return: returns an object of SufficientStatistics
+    """
+
+    logger.info("Computing sufficient statistics")
+    zero = SufficientStatistics(0, 0., 0., 0. if gram else None)
+    return as_rdd_of_blocks(data, BLOCK_SIZE_).treeAggregate(
+      zero,
+      lambda s, X: s + SufficientStatistics.of(X, gram),
+      lambda s, t: s + t,
+      depth)
 
 
 def column_means(data: pyspark.rdd.RDD):
@@ -54,8 +162,7 @@ def column_means(data: pyspark.rdd.RDD):
     """
 
     logger.info("Computing data means")
-    summary = Statistics.colStats(data)
-    return summary.mean()
+    return sufficient_statistics(data).mean
 
 
 def column_statistics(data: pyspark.rdd.RDD):
@@ -67,8 +174,8 @@ def column_statistics(data: pyspark.rdd.RDD):
     """
 
     logger.info("Computing data statistics")
-    summary = Statistics.colStats(data)
-    return summary.mean(), summary.variance()
+    stats = sufficient_statistics(data)
+    return stats.mean, stats.variance()
 
 
 def covariance_matrix(data: pyspark.mllib.linalg.distributed.RowMatrix):
@@ -86,11 +193,14 @@ def correlation_matrix(data: pyspark.rdd.RDD):
     return Statistics.corr(data)
 
 
-def explained_variance(data):
+def explained_variance(data, total=None):
     """
     Compute the explained variance for the columns of a numpy matrix.
 
     :param data: a numpy matrix or array
+    :param total: the total variance the standard deviations of an array are
+     normalized by, e.g. if only the first components have been computed.
+     Defaults to the sum of their variances
     :return: returns a numpy array with explained variances per column
     """
 
@@ -99,11 +209,11 @@ def explained_variance(data):
         var = numpy.apply_along_axis(lambda x: sum(x ** 2) / p, 0, data)
     else:
         var = (data ** 2)
-        var /= numpy.sum(var)
+        var /= numpy.sum(var) if total is None else total
     return var
 
 
-def cumulative_explained_variance(data, sort=True):
+def cumulative_explained_variance(data, sort=True, total=None):
     """
     Compute the cumulative explained variance for the columns of a
     numpy matrix. If sorted is set to false, the variances are not sorted
@@ -112,9 +222,10 @@ def cumulative_explained_variance(data, sort=True):
     :param data: a numpy matrix
     :param sort: boolean of the variances should be sorted decreasingly.
      This is the default.
+    :param total: the total variance, see `explained_variance`
     :return: returns a numpy array with cumulative variances
     """
-    var = explained_variance(data)
+    var = explained_variance(data, total)
     return numpy.cumsum(sorted(var, reverse=sort))
 
 
@@ -129,9 +240,8 @@ def center(data: pyspark.rdd.RDD, means=None):
 def scale(data: pyspark.rdd.RDD, means=None, variance=None):
     logger.info("Scaling data")
     if means is None or variance is None:
-        means, variance = column_statistics(data)
-        n = data.count()
-        variance = variance * (n - 1) / n
+        stats = sufficient_statistics(data)
+        means, variance = stats.mean, stats.variance(ddof=0)
     sd = numpy.sqrt(variance)
     data = data.map(lambda x: (x - means) / sd)
     return data, means, variance
@@ -150,12 +260,7 @@ def chisquare(data, pval):
 
 def sum_of_squared_errors(data: pyspark.sql.DataFrame):
     logger.info("Computing SSE")
-    rdd = as_rdd_of_array(data)
-    means = column_means(rdd)
-    sse = (rdd
-           .map(lambda x: (x - means).T.dot(x - means))
-           .reduce(lambda x, y: x + y))
-    return sse
+    return sufficient_statistics(as_rdd_of_array(data)).sum_of_squared_errors()
 
 
 def loglik(data: pyspark.sql.DataFrame):
@@ -178,15 +283,79 @@ def loglik(data: pyspark.sql.DataFrame):
     return loglik
 
 
-def within_group_scatter(data: pyspark.sql.DataFrame,
-                         features, response, targets):
-    p = len(features)
-    sw = numpy.zeros((p, p))
-    for target in targets:
-        df_t = data.filter("{} == '{}'".format(response, target))
-        X_t = RowMatrix(df_t.select(features).rdd.map(numpy.array))
-        sw += X_t.computeCovariance().toArray() * (df_t.count() - 1)
-    return sw
+def grouped_sufficient_statistics(data: pyspark.sql.DataFrame, features,
+                                  response, gram=True):
+    """
+    Compute the sufficient statistics of the features of every group of a
+    data frame in a single pass over the data. Every partition computes the
+    statistics of its groups blockwise, which are then merged per group.
+
+    :param data: a data frame
+    :param features: the column names of the features
+    :param response: the column name of the groups
+    :param gram: boolean if the Gram matrices should be computed
+    :return: returns a dictionary mapping every group to its
+     SufficientStatistics
+    """
+
+    logger.info("Computing sufficient statistics per group")
+
+    def _statistics(rows):
+        stats = {}
+        for chunk in as_chunks(rows, BLOCK_SIZE_):
+            groups = {}
+            for row in chunk:
+                groups.setdefault(row[0], []).append(row[1:])
+            for target, X in groups.items():
+                s = SufficientStatistics.of(
+                  numpy.array(X, dtype=numpy.float64), gram)
+                stats[target] = stats[target] + s if target in stats else s
+        return iter(stats.items())
+
+    return (data.select([response] + list(features)).rdd
+            .mapPartitions(_statistics)
+            .reduceByKey(lambda s, t: s + t)
+            .collectAsMap())
+
+
+def within_group_scatter(groups):
+    """
+    Compute the within-group scatter matrix from the sufficient statistics
+    of every group.
+
+    :param groups: a dictionary of SufficientStatistics with Gram matrices
+    :return: returns a (p x p) numpy array
+    """
+
+    return sum(s.scatter() for s in groups.values())
+
+
+def between_group_scatter(groups):
+    """
+    Compute the between-group scatter matrix from the sufficient statistics
+    of every group.
+
+    :param groups: a dictionary of SufficientStatistics
+    :return: returns a (p x p) numpy array
+    """
+
+    n = sum(s.n for s in groups.values())
+    mean = sum(s.n * s.mean for s in groups.values()) / n
+    return sum(s.n * numpy.outer(s.mean - mean, s.mean - mean)
+               for s in groups.values())
+
+
+def random_fourier_features(X, w, b):
+    """
+    Computes random Fourier features of a numpy array.
+
+    :param X: a (n x p) numpy array
+    :param w: a (p x D) numpy array of Fourier coefficients
+    :param b: a vector of D Fourier offsets
+    :return: returns a (n x D) numpy array
+    """
+
+    return numpy.sqrt(2.0 / len(b)) * numpy.cos(X.dot(w) + b)
 
 
 def fourier_transform(X, w, b):
@@ -196,20 +365,94 @@ def fourier_transform(X, w, b):
     return RowMatrix(Y)
 
 
-def fourier(X: RowMatrix, n_features, seed=23, gamma=1):
-    p = X.numCols()
-    random_state = numpy.random.RandomState(seed)
+def fourier_coefficients(p, n_features, seed=23, gamma=1):
+    """
+    Sample the coefficients of random Fourier features of an RBF kernel.
+
+    :param p: the number of columns of the data
+    :param n_features: the number of Fourier features D
+    :param seed: the seed of the random state
+    :param gamma: the bandwidth of the RBF kernel
+    :return: returns a tuple of a (p x D) DenseMatrix and a vector of D
+     offsets
+    """
 
+    random_state = numpy.random.RandomState(seed)
     w = numpy.sqrt(2 * gamma) * random_state.normal(size=(p, n_features))
     w = DenseMatrix(p, n_features, w.flatten(), isTransposed=True)
     b = random_state.uniform(0, 2 * numpy.pi, size=n_features)
+    return w, b
 
+
+def fourier(X: RowMatrix, n_features, seed=23, gamma=1):
+    w, b = fourier_coefficients(X.numCols(), n_features, seed, gamma)
     Y = fourier_transform(X, w, b)
     return Y, w, b
 
 
-def normalized_cumsum(vec):
-    return numpy.cumsum(vec / numpy.sum(vec))
+def kernel_matrix(X, Y, kernel=RBF_, gamma=1., degree=3, coef0=1.):
+    """
+    Computes the kernel matrix between the rows of two numpy arrays.
+
+    :param X: a (n x p) numpy array
+    :param Y: a (m x p) numpy array
+    :param kernel: either 'rbf', 'polynomial' or 'linear'
+    :param gamma: the bandwidth of the RBF kernel or the scale of the
+     polynomial kernel
+    :param degree: the degree of the polynomial kernel
+    :param coef0: the offset of the polynomial kernel
+    :return: returns a (n x m) numpy array
+    """
+
+    K = X.dot(Y.T)
+    if kernel == LINEAR_:
+        return K
+    if kernel == POLYNOMIAL_:
+        return (gamma * K + coef0) ** degree
+    if kernel == RBF_:
+        D = numpy.sum(X ** 2, axis=1)[:, numpy.newaxis] - 2 * K + \
+            numpy.sum(Y ** 2, axis=1)[numpy.newaxis, :]
+        return numpy.exp(-gamma * numpy.maximum(D, 0))
+    raise ValueError("Kernel '{}' not supported".format(kernel))
+
+
+def nystroem_normalization(K, tol=1e-10):
+    """
+    Computes the normalization of a Nystroem approximation, i.e. the inverse
+    square root of the kernel matrix of the landmarks. Eigenvalues smaller
+    than 'tol' relative to the largest one are treated as zero.
+
+    :param K: the (m x m) kernel matrix of the landmarks
+    :param tol: the relative tolerance of the eigenvalues
+    :return: returns a (m x m) numpy array
+    """
+
+    evals, evecs = linalg.eigh(K)
+    keep = evals > tol * max(evals.max(), 0)
+    U = evecs[:, keep]
+    return (U / numpy.sqrt(evals[keep])).dot(U.T)
+
+
+def nystroem_features(X, landmarks, normalization, kernel=RBF_, gamma=1.,
+                      degree=3, coef0=1.):
+    """
+    Computes the Nystroem features of a numpy array.
+
+    :param X: a (n x p) numpy array
+    :param landmarks: a (m x p) numpy array of landmarks
+    :param normalization: the (m x m) normalization of the landmarks
+    :param kernel: the kernel and its parameters, see `kernel_matrix`
+    :return: returns a (n x m) numpy array
+    """
+
+    return kernel_matrix(X, landmarks, kernel, gamma, degree, coef0).dot(
+      normalization)
+
+
+def normalized_cumsum(vec, total=None):
+    if total is None:
+        total = numpy.sum(vec)
+    return numpy.cumsum(vec / total)
 
 
 def sym_decorrelate(w):
@@ -0,0 +1,104 @@
+# Copyright (C) 2018, 2019 Simon Dirmeier
+#
+# This file is part of pybda.
+#
+# pybda is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pybda is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pybda. If not, see <http://www.gnu.org/licenses/>.
+#
+# @author = 'Simon Dirmeier'
+# @email = 'simon.dirmeier@bsse.ethz.ch'
+
+
+import logging
+
+import click
+
+from pybda.globals import FACTOR_ANALYSIS__, ICA__, KPCA__, LDA__, PCA__
+from pybda.util.options import cache_options, output_options
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def as_estimator(spark, fit):
+    """
+    Create the estimator of a saved dimension reduction fit, such that it
+    can be used to transform data without fitting it again.
+
+    :param spark: a running SparkSession
+    :param fit: a DimensionReductionFit
+    :return: returns a DimensionReduction object
+    """
+
+    from pybda.factor_analysis import FactorAnalysis
+    from pybda.ica import ICA
+    from pybda.kpca import KPCA
+    from pybda.lda import LDA
+    from pybda.pca import PCA
+
+    n, features = fit.n_components, fit.features
+    if fit.kind == PCA__:
+        estimator = PCA(spark, n, features)
+    elif fit.kind == KPCA__:
+        estimator = KPCA(spark, n, features, fit.n_fourier_features,
+                         fit.gamma, approximation=fit.approximation,
+                         kernel=fit.kernel, degree=fit.degree,
+                         coef0=fit.coef0)
+    elif fit.kind == FACTOR_ANALYSIS__:
+        estimator = FactorAnalysis(spark, n, features)
+    elif fit.kind == ICA__:
+        estimator = ICA(spark, n, features)
+    elif fit.kind == LDA__:
+        estimator = LDA(spark, n, features, fit.response)
+    else:
+        raise ValueError("Unknown model kind: {}".format(fit.kind))
+    estimator.model = fit
+    return estimator
+
+
+@click.command()
+@click.argument("model", type=str)
+@click.argument("file", type=str)
+@click.argument("outpath", type=str)
+@output_options
+@cache_options
+def run(model, file, outpath, fmt, compression, cache_dir):
+    """
+    Transform a data set using a saved dimension reduction model.
+    """
+
+    from pybda.util.string import drop_suffix
+    from pybda.logger import set_logger
+    from pybda.spark_session import SparkSession
+    from pybda.io.as_filename import as_logfile
+    from pybda.io.io import read_and_transmute
+    from pybda.fit.dimension_reduction_fit import load
+
+    model = drop_suffix(model, "/")
+    outpath = drop_suffix(outpath, "/")
+    set_logger(as_logfile(outpath))
+
+    with SparkSession() as spark:
+        try:
+            fit = load(model)
+            data = read_and_transmute(spark, file, fit.features,
+                                      assemble_features=False,
+                                      cache_dir=cache_dir)
+            trans = as_estimator(spark, fit).transform(data)
+            trans.write(outpath, fmt, compression)
+        except Exception as e:
+            logger.error("Some error: {}".format(str(e)))
+
+
+if __name__ == "__main__":
+    run()
@@ -19,17 +19,36 @@
 # @email = 'simon.dirmeier@bsse.ethz.ch'
 
 
+import itertools
 import logging
+
 import numpy
 
 from pyspark.sql.functions import udf
 from pyspark.sql.types import DoubleType, ArrayType
 
+try:
+    from pyspark.ml.functions import vector_to_array
+except ImportError:
+    vector_to_array = None
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
 def as_array(vector):
+    """
+    Convert a column of spark vectors to a column of arrays of doubles. Uses
+    the JVM-native 'vector_to_array' where available (pyspark >= 3.0) and a
+    Python UDF otherwise.
+
+    :param vector: a column of spark vectors
+    :return: returns a column of arrays
+    """
+
+    if vector_to_array is not None:
+        return vector_to_array(vector)
+
     def to_array(col):
         def to_array_(v):
             return v.toArray().tolist()
@@ -52,3 +71,46 @@ def as_pandas(data):
 
 def as_rdd_of_array(data):
     return data.rdd.map(numpy.array)
+
+
+def as_block(rows):
+    """
+    Stack numpy arrays or spark vectors into a 2-D numpy array.
+
+    :param rows: a list of numpy arrays or spark vectors
+    :return: returns a (len(rows) x p) numpy array
+    """
+
+    return numpy.vstack(
+      [r.toArray() if hasattr(r, "toArray") else r for r in rows]).astype(
+      numpy.float64)
+
+
+def as_rdd_of_blocks(data, block_size):
+    """
+    Stack the rows of every partition of an RDD into 2-D numpy arrays.
+
+    :param data: an RDD of numpy arrays or spark vectors
+    :param block_size: the maximal number of rows per block
+    :return: returns an RDD of numpy arrays
+    """
+
+    return data.mapPartitions(
+      lambda it: (as_block(c) for c in as_chunks(it, block_size)))
+
+
+def as_chunks(iterator, size):
+    """
+    Split an iterator into lists of at most 'size' elements.
+
+    :param iterator: an iterator, e.g. the rows of a partition
+    :param size: the maximal number of elements per chunk
+    :return: returns a generator of lists
+    """
+
+    iterator = iter(iterator)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
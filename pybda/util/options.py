@@ -0,0 +1,71 @@
+# Copyright (C) 2018, 2019 Simon Dirmeier
+#
+# This file is part of pybda.
+#
+# pybda is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pybda is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pybda. If not, see <http://www.gnu.org/licenses/>.
+#
+# @author = 'Simon Dirmeier'
+# @email = 'simon.dirmeier@bsse.ethz.ch'
+
+
+import click
+
+from pybda.globals import MEMORY_AND_DISK_, TSV_
+
+
+def output_options(command):
+    """
+    Add the options that control how the data of a command are written,
+    i.e. '--format' and '--compression', to a click command.
+
+    :param command: the function of a click command
+    :return: returns the decorated function
+    """
+
+    command = click.option(
+      "--compression", default=None,
+      help="Compression codec of the output, e.g. 'gzip' or 'snappy'")(command)
+    return click.option(
+      "--format", "fmt", default=TSV_,
+      help="Output format, either 'tsv' or 'parquet'")(command)
+
+
+def cache_options(command):
+    """
+    Add the option that controls where parquet copies of tsv inputs are
+    kept, i.e. '--cache-dir', to a click command.
+
+    :param command: the function of a click command
+    :return: returns the decorated function
+    """
+
+    return click.option(
+      "--cache-dir", default=None,
+      help="Folder where parquet copies of tsv inputs are kept. "
+           "If not given, inputs are not copied")(command)
+
+
+def storage_options(command):
+    """
+    Add the option that controls how the data of a fit are persisted,
+    i.e. '--storage-level', to a click command.
+
+    :param command: the function of a click command
+    :return: returns the decorated function
+    """
+
+    return click.option(
+      "--storage-level", default=MEMORY_AND_DISK_,
+      help="Spark storage level of the data persisted during a fit, "
+           "e.g. 'MEMORY_ONLY' or 'DISK_ONLY'")(command)
@@ -43,3 +43,18 @@ def split(els, split):
 
 def paste(string, array):
     return list(map(string + '_{}'.format, array))
+
+
+def as_bytes(size):
+    """
+    Convert a JVM memory string, e.g. '512m' or '4g', to a number of bytes.
+
+    :param size: the memory string
+    :return: returns the number of bytes as int
+    """
+
+    units = {"k": 1, "m": 2, "g": 3, "t": 4}
+    size = str(size).strip().lower().rstrip("b")
+    if size and size[-1] in units:
+        return int(float(size[:-1]) * 1024 ** units[size[-1]])
+    return int(size)
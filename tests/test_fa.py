@@ -25,7 +25,7 @@ import sklearn.decomposition
 from sklearn.preprocessing import scale
 
 from pybda.factor_analysis import FactorAnalysis
-from pybda.globals import FEATURES__
+from pybda.globals import EM_, FEATURES__
 from pybda.spark.features import split_vector
 from tests.test_dimred_api import TestDimredAPI
 
@@ -63,6 +63,27 @@ class TestFA(TestDimredAPI):
         cls.sk_fit = cls.sk_fa.fit(cls.X_lo)
         cls.sk_trans = cls.sk_fit.transform(cls.X_lo)
 
+        cls.em_fa = FactorAnalysis(cls.spark(), 2, cls.features(),
+                                   max_iter=25, algorithm=EM_)
+        cls.em_fa.fit(cls._spark_lo)
+
+        # the ten iris rows lead to Heywood cases, where EM and sklearn stop
+        # at different boundary solutions, so compare both on data that has
+        # been sampled from a factor model
+        random_state = numpy.random.RandomState(23)
+        L = random_state.normal(size=(6, 2))
+        cls.X_fm = random_state.normal(size=(500, 2)).dot(L.T) + \
+            random_state.normal(size=(500, 6)) * \
+            numpy.sqrt(random_state.uniform(.5, 1.5, 6))
+        features = ["x{}".format(i) for i in range(6)]
+        df = pandas.DataFrame(data=cls.X_fm, columns=features)
+        cls.em_fm = FactorAnalysis(cls.spark(), 2, features, threshold=1e-6,
+                                   max_iter=1000, algorithm=EM_)
+        cls.em_fm.fit(TestDimredAPI.spark().createDataFrame(df))
+        cls.sk_fm = sklearn.decomposition.FactorAnalysis(
+          n_components=2, max_iter=1000, tol=1e-8,
+          random_state=23).fit(cls.X_fm)
+
     @classmethod
     def tearDownClass(cls):
         cls.log("FA")
@@ -74,6 +95,28 @@ class TestFA(TestDimredAPI):
           numpy.absolute(self.sk_fit.loglike_),
           atol=1e-01)
 
+    def test_fa_em_loglik_increases(self):
+        ll = numpy.array(self.em_fa.model.loglikelihood)
+        assert numpy.all(numpy.diff(ll) >= -1e-06)
+
+    def test_fa_em_loadings(self):
+        assert self.em_fa.model.loadings.shape == self.W.shape
+        assert len(self.em_fa.model.error_vcov) == len(self.psi)
+
+    def test_fa_em_loglik_is_sklearn_loglik(self):
+        assert numpy.allclose(self.em_fm.model.loglikelihood[-1],
+                              self.sk_fm.loglike_[-1], atol=1e-01)
+
+    def test_fa_em_loadings_are_sklearn_loadings(self):
+        # loadings are only identified up to rotation and sign
+        W = self.em_fm.model.loadings
+        sk_W = self.sk_fm.components_
+        assert numpy.allclose(W.T.dot(W), sk_W.T.dot(sk_W), atol=1e-02)
+
+    def test_fa_em_psi_is_sklearn_psi(self):
+        assert numpy.allclose(self.em_fm.model.error_vcov,
+                              self.sk_fm.noise_variance_, atol=1e-02)
+
     def test_fa_transform(self):
         for i in range(2):
             ax1 = sorted(numpy.absolute(self.trans[:, i]))
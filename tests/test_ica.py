@@ -25,7 +25,7 @@ import sklearn.decomposition
 from numpy.linalg import linalg
 from sklearn.preprocessing import scale
 
-from pybda.globals import FEATURES__
+from pybda.globals import FEATURES__, PARALLEL_
 from pybda.ica import ICA
 from pybda.pca import PCA
 from pybda.spark.features import split_vector
@@ -69,6 +69,18 @@ class TestICA(TestDimredAPI):
         cls.sk_fit.whiten = False
         cls.sk_trans = cls.sk_fit.transform(cls.X_lo)
 
+        cls.par_ica = ICA(cls.spark(), 2, cls.features(), max_iter=5,
+                          algorithm=PARALLEL_)
+        cls.par_trans = split_vector(
+            cls.par_ica.fit_transform(cls._spark_lo).data.select(FEATURES__),
+            FEATURES__).toPandas().values
+        cls.sk_par_ica = sklearn.decomposition.FastICA(
+          n_components=2, algorithm="parallel", fun="exp",
+          max_iter=5, tol=1e-03, random_state=23)
+        cls.sk_par_fit = cls.sk_par_ica.fit(cls.X_lo)
+        cls.sk_par_fit.whiten = False
+        cls.sk_par_trans = cls.sk_par_fit.transform(cls.X_lo)
+
     @classmethod
     def tearDownClass(cls):
         cls.log("ICA")
@@ -80,6 +92,12 @@ class TestICA(TestDimredAPI):
             ax2 = sorted(numpy.absolute(self.sk_trans[:, i]))
             assert numpy.allclose(ax1, ax2, atol=1e-02)
 
+    def test_ica_parallel_transform(self):
+        for i in range(2):
+            ax1 = sorted(numpy.absolute(self.par_trans[:, i]))
+            ax2 = sorted(numpy.absolute(self.sk_par_trans[:, i]))
+            assert numpy.allclose(ax1, ax2, atol=1e-02)
+
     def test_ica_whitening(self):
         assert numpy.allclose(
           numpy.absolute(self.K),
@@ -0,0 +1,115 @@
+# Copyright (C) 2018, 2019 Simon Dirmeier
+#
+# This file is part of pybda.
+#
+# pybda is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pybda is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pybda. If not, see <http://www.gnu.org/licenses/>.
+#
+# @author = 'Simon Dirmeier'
+# @email = 'simon.dirmeier@bsse.ethz.ch'
+
+
+import os
+import shutil
+import tempfile
+
+from pybda.globals import DOUBLE_, FEATURES__
+from pybda.io.io import read_and_transmute
+from tests.test_api import TestAPI
+
+
+class TestIO(TestAPI):
+    """
+    Tests reading and casting tsv files
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.log("IO")
+        cls._dir = tempfile.mkdtemp()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.log("IO")
+        shutil.rmtree(cls._dir)
+        super().tearDownClass()
+
+    @classmethod
+    def write(cls, name, lines):
+        file_name = os.path.join(cls._dir, name)
+        with open(file_name, "w") as fh:
+            fh.write("\n".join(lines) + "\n")
+        return file_name
+
+    @staticmethod
+    def vectors(data):
+        return sorted(r[0].toArray().tolist()
+                      for r in data.select(FEATURES__).collect())
+
+    def test_features_are_read_as_double(self):
+        file_name = self.write(
+          "double.tsv", ["id\tx\ty", "a\t0.1\t1.5", "b\t2.25\t3"])
+        data = read_and_transmute(self.spark(), file_name, ["x", "y"],
+                                  assemble_features=False)
+        types = dict(data.dtypes)
+        assert types["x"] == DOUBLE_ and types["y"] == DOUBLE_
+        assert data.collect()[0]["x"] == 0.1
+
+    def test_malformed_value_only_nulls_its_cell(self):
+        file_name = self.write(
+          "malformed.tsv", ["id\tx\ty", "a\t1\tNA", "b\tnan\t2", "c\t\t3"])
+        data = read_and_transmute(self.spark(), file_name, ["x", "y"],
+                                  assemble_features=False)
+        rows = {r["id"]: r for r in data.collect()}
+        assert sorted(rows.keys()) == ["a", "b", "c"]
+        assert rows["a"]["x"] == 1 and rows["a"]["y"] == 0
+        assert rows["b"]["y"] == 2
+        assert rows["c"]["x"] == 0 and rows["c"]["y"] == 3
+
+    def test_cached_read_drops_previous_components(self):
+        file_name = self.write(
+          "pca.tsv", ["id\tf_0\tf_1", "a\t0.1\t1.5", "b\t2.25\t3"])
+        cache_dir = os.path.join(self._dir, "cache")
+        fresh = read_and_transmute(self.spark(), file_name, ["x", "y"])
+        cached = read_and_transmute(self.spark(), file_name, ["x", "y"],
+                                    cache_dir=cache_dir)
+        again = read_and_transmute(self.spark(), file_name, ["x", "y"],
+                                   cache_dir=cache_dir)
+        assert fresh.columns == ["id", FEATURES__]
+        assert cached.columns == fresh.columns
+        assert again.columns == fresh.columns
+        assert self.vectors(again) == self.vectors(fresh)
+
+    def test_cached_read_removes_stale_copies(self):
+        file_name = self.write(
+          "stale.tsv", ["id\tx\ty", "a\t0.1\t1.5", "b\t2.25\t3"])
+        cache_dir = os.path.join(self._dir, "stale")
+        read_and_transmute(self.spark(), file_name, ["x", "y"],
+                           cache_dir=cache_dir)
+        read_and_transmute(self.spark(), file_name, ["x"],
+                           cache_dir=cache_dir)
+        folders = os.listdir(cache_dir)
+        assert len(folders) == 1
+        assert len(os.listdir(os.path.join(cache_dir, folders[0]))) == 1
+
+    def test_failed_cache_falls_back_to_tsv(self):
+        file_name = self.write(
+          "fallback.tsv", ["id\tx\ty", "a\t0.1\t1.5", "b\t2.25\t3"])
+        # a file cannot hold the copies, so writing the cache fails
+        cache_dir = self.write("not_a_folder", ["x"])
+        fresh = read_and_transmute(self.spark(), file_name, ["x", "y"])
+        data = read_and_transmute(self.spark(), file_name, ["x", "y"],
+                                  cache_dir=cache_dir)
+        assert data.columns == fresh.columns
+        assert self.vectors(data) == self.vectors(fresh)
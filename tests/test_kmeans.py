@@ -18,11 +18,15 @@
 # @author = 'Simon Dirmeier'
 # @email = 'simon.dirmeier@bsse.ethz.ch'
 
+import glob
+import os
+import tempfile
+
 import numpy
 
 from pybda.fit.kmeans_fit import KMeansFit
-from pybda.globals import PREDICTION__
-from pybda.kmeans import KMeans
+from pybda.globals import MINIBATCH_, PREDICTION__
+from pybda.kmeans import KMeans, split_clusters
 from pybda.spark.features import assemble
 from tests.test_clustering_api import TestClusteringAPI
 
@@ -42,6 +46,16 @@ class TestKMeans(TestClusteringAPI):
         cls.fit = cls.model.model
         cls.transform = cls.fit[2].transform(cls.data).toPandas()
 
+        cls.mb_model = KMeans(cls.spark(), [2, 3], method=MINIBATCH_,
+                              fraction=1.)
+        cls.mb_model.fit(cls.data)
+        cls.mb_fit = cls.mb_model.model
+        cls.mb_transform = cls.mb_fit[2].transform(cls.data).toPandas()
+
+        cls.ws_model = KMeans(cls.spark(), [2, 3], warm_start=True)
+        cls.ws_model.fit(cls.data)
+        cls.ws_fit = cls.ws_model.model
+
     @classmethod
     def tearDownClass(cls):
         cls.log("Kmeans")
@@ -92,3 +106,41 @@ class TestKMeans(TestClusteringAPI):
 
     def test_transform_kmeans_write(self):
         self.model.write(self.data)
+
+    def test_transform_kmeans_write_clusters(self):
+        outpath = os.path.join(tempfile.mkdtemp(), "kmeans")
+        self.model.write(self.data, outpath)
+        fls = glob.glob(outpath + "-transformed-K2-clusters/prediction=*")
+        assert len(fls) == 2
+
+    def test_fit_minibatch_kmeans_cluster_sizes(self):
+        sizes = self.mb_fit[3].fit.summary.clusterSizes
+        assert sum(sizes) == self.X().shape[0]
+
+    def test_fit_minibatch_kmeans_within_cluster_variance(self):
+        for k in [2, 3]:
+            mb, ll = self.mb_fit[k], self.fit[k]
+            assert mb.within_cluster_variance < \
+                1.1 * ll.within_cluster_variance
+
+    def test_transform_minibatch_kmeans_prediction_works(self):
+        vals = numpy.unique(self.mb_transform[PREDICTION__].values)
+        assert len(vals) == 2
+
+    def test_fit_warm_start_kmeans_keys(self):
+        assert list(self.ws_fit.models.keys()) == [2, 3]
+
+    def test_fit_warm_start_kmeans_within_cluster_variance(self):
+        for k in [2, 3]:
+            ws, ll = self.ws_fit[k], self.fit[k]
+            assert ws.within_cluster_variance < \
+                1.1 * ll.within_cluster_variance
+
+    def test_split_clusters(self):
+        centers = numpy.array([[0., 0.], [10., 10.]])
+        squares = numpy.array([[1., 1.], [4., 1.]])
+        split = split_clusters(centers, [2, 2], squares, 3)
+        assert split.shape == (3, 2)
+        assert numpy.allclose(split[0], centers[0])
+        assert split[1][0] < 10. < split[2][0]
+        assert split[1][1] == split[2][1] == 10.
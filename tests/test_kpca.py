@@ -25,7 +25,7 @@ import sklearn.kernel_approximation
 from sklearn.decomposition import PCA
 from sklearn.preprocessing import scale
 
-from pybda.globals import FEATURES__
+from pybda.globals import FEATURES__, LINEAR_, NYSTROEM_, POLYNOMIAL_
 from pybda.kpca import KPCA
 from pybda.spark.features import split_vector
 from pybda.stats.stats import fourier_transform
@@ -81,7 +81,7 @@ class TestKPCA(TestDimredAPI):
         super().tearDownClass()
 
     def test_kpca_fourier(self):
-        X = self.kpca._preprocess_data(self._spark_lo)
+        X = self.kpca._preprocess_data(self._spark_lo, persist=False)
         X = fourier_transform(X,
                               self.kpca.model.fourier_coefficients,
                               self.kpca.model.fourier_offset)
@@ -107,3 +107,44 @@ class TestKPCA(TestDimredAPI):
             ax2 = sorted(numpy.absolute(self.fittransform_trans[:, i]))
             assert numpy.allclose(ax1, ax2, atol=1e-01)
 
+    def test_kpca_fused_is_same_as_stored(self):
+        kpca = KPCA(self.spark(), 2, self.features(), 5, 1., fused=True)
+        kpca.fit(self._spark_lo)
+        assert numpy.allclose(
+          numpy.absolute(kpca.model.loadings[:2]),
+          numpy.absolute(self.evals[:2]),
+          atol=1e-01)
+        assert numpy.allclose(kpca.model.sds[:2], self.sds[:2], atol=1e-01)
+
+    def test_kpca_nystroem_linear_is_pca(self):
+        kpca = KPCA(self.spark(), 2, self.features(), 10,
+                    approximation=NYSTROEM_, kernel=LINEAR_)
+        trans = kpca.fit_transform(self._spark_lo)
+        trans = split_vector(trans.data.select(FEATURES__),
+                             FEATURES__).toPandas().values
+        sk_trans = PCA(n_components=2).fit_transform(self.X_lo)
+        for i in range(2):
+            ax1 = sorted(numpy.absolute(trans[:, i]))
+            ax2 = sorted(numpy.absolute(sk_trans[:, i]))
+            assert numpy.allclose(ax1, ax2, atol=1e-01)
+
+    def test_kpca_nystroem_polynomial(self):
+        kpca = KPCA(self.spark(), 2, self.features(), 5, 1.,
+                    approximation=NYSTROEM_, kernel=POLYNOMIAL_)
+        kpca.fit(self._spark_lo)
+        model = kpca.model
+        assert model.landmarks.shape == (5, 4)
+        assert model.normalization.shape == (5, 5)
+        assert model.loadings.shape == (5, 5)
+        assert numpy.all(numpy.diff(model.sds) <= 1e-10)
+
+    def test_kpca_fourier_needs_rbf(self):
+        with self.assertRaises(ValueError):
+            KPCA(self.spark(), 2, self.features(), kernel=POLYNOMIAL_)
+
+    def test_kpca_nystroem_unpersists_after_fit(self):
+        sc = self.spark().sparkContext
+        n_persisted = len(sc._jsc.getPersistentRDDs())
+        KPCA(self.spark(), 2, self.features(), 5,
+             approximation=NYSTROEM_).fit(self._spark_lo)
+        assert len(sc._jsc.getPersistentRDDs()) == n_persisted
@@ -23,6 +23,7 @@ import numpy
 from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
 
 from pybda.lda import LDA
+from pybda.stats.stats import grouped_sufficient_statistics
 from tests.test_dimred_api import TestDimredAPI
 
 
@@ -45,6 +46,12 @@ class TestLDA(TestDimredAPI):
 
         cls.fit_tran = cls.lda.fit_transform(cls.spark_df())
 
+        cls.shrunk_lda = LDA(cls.spark(), 2, cls.features(), cls.response(),
+                             shrinkage=.5)
+        cls.shrunk_lda.fit(cls.spark_df())
+        cls.sk_shrunk_lda = LinearDiscriminantAnalysis(
+          n_components=2, solver="eigen", shrinkage=.5).fit(cls.X(), cls.y())
+
     @classmethod
     def tearDownClass(cls):
         cls.log("LDA")
@@ -56,6 +63,45 @@ class TestLDA(TestDimredAPI):
           numpy.absolute(self.evec[:,:2]),
           atol=1e-01)
 
+    def test_lda_group_statistics(self):
+        groups = grouped_sufficient_statistics(
+          self.spark_df(), self.features(), self.response())
+        y = numpy.asarray(self.y())
+        assert sorted(groups.keys()) == sorted(numpy.unique(y))
+        for target, stats in groups.items():
+            X = numpy.asarray(self.X())[y == target]
+            assert stats.n == X.shape[0]
+            assert numpy.allclose(stats.mean, X.mean(axis=0))
+
+    def test_lda_loadings_have_unit_length(self):
+        assert self.evec.shape == (len(self.features()), 2)
+        assert numpy.allclose(numpy.linalg.norm(self.evec, axis=0), 1)
+
+    def test_lda_shrinkage(self):
+        proj = self.shrunk_lda.model.projection
+        arr = self.shrunk_lda.model.variances
+        assert proj.shape == (len(self.features()), 2)
+        assert numpy.all(arr[:-1] >= arr[1:])
+
+    def test_lda_shrinkage_loadings(self):
+        sk = self.sk_shrunk_lda.scalings_[:, :2]
+        sk = sk / numpy.linalg.norm(sk, axis=0)
+        assert numpy.allclose(
+          numpy.absolute(sk),
+          numpy.absolute(self.shrunk_lda.model.projection),
+          atol=1e-03)
+
+    def test_lda_shrinkage_explained_variance(self):
+        model = self.shrunk_lda.model
+        assert numpy.allclose(
+          model.variances / model.total_variance,
+          self.sk_shrunk_lda.explained_variance_ratio_,
+          atol=1e-03)
+
+    def test_lda_total_variance(self):
+        model = self.lda.model
+        assert numpy.allclose(model.total_variance, sum(model.variances))
+
     def test_lda_response(self):
         assert self.fit_tran.response == self.response()
 
@@ -0,0 +1,98 @@
+# Copyright (C) 2018, 2019 Simon Dirmeier
+#
+# This file is part of pybda.
+#
+# pybda is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pybda is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pybda. If not, see <http://www.gnu.org/licenses/>.
+#
+# @author = 'Simon Dirmeier'
+# @email = 'simon.dirmeier@bsse.ethz.ch'
+
+
+import numpy
+from pyspark.mllib.linalg.distributed import RowMatrix
+from sklearn import datasets
+from sklearn.preprocessing import scale
+
+from pybda.globals import ARPACK_, GRAM_, GRAM_MAX_FEATURES_
+from pybda.stats.linalg import (_svd_method, _svd_method_for,
+                                randomized_svd, svd)
+from tests.test_api import TestAPI
+
+
+class TestLinalg(TestAPI):
+    """
+    Tests the linear algebra API
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.log("Linalg")
+
+        iris = datasets.load_iris()
+        cls._X = scale(iris.data[:, :4])
+        cls._rows = RowMatrix(
+          cls.spark().sparkContext.parallelize(list(cls._X), 3))
+
+        cls.gram = svd(cls._rows, 2, GRAM_)
+        cls.arpack = svd(cls._rows, 2, ARPACK_)
+        cls.randomized = randomized_svd(cls._rows, 2)
+        _, cls.s, cls.V = numpy.linalg.svd(cls._X, full_matrices=False)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.log("Linalg")
+        super().tearDownClass()
+
+    def test_gram_singular_values(self):
+        assert numpy.allclose(self.gram[0], self.arpack[0], atol=1e-06)
+
+    def test_gram_singular_vectors(self):
+        assert numpy.allclose(
+          numpy.absolute(self.gram[1]),
+          numpy.absolute(self.arpack[1]),
+          atol=1e-06)
+
+    def test_gram_unexplained_variance(self):
+        assert numpy.allclose(self.gram[2], self.arpack[2])
+
+    def test_gram_singular_values_match_numpy(self):
+        assert numpy.allclose(self.gram[0], self.s[:2])
+
+    def test_randomized_singular_values(self):
+        assert numpy.allclose(self.randomized[0], self.s[:2], atol=1e-04)
+
+    def test_randomized_singular_vectors(self):
+        assert numpy.allclose(
+          numpy.absolute(self.randomized[1]),
+          numpy.absolute(self.V[:2]),
+          atol=1e-04)
+
+    def test_randomized_unexplained_variance(self):
+        assert numpy.allclose(
+          self.randomized[2], numpy.sum(self.s[2:] ** 2), atol=1e-04)
+
+    def test_svd_method_auto_uses_gram_for_few_features(self):
+        assert _svd_method(self._rows) == GRAM_
+
+    def test_svd_method_for_few_features(self):
+        assert _svd_method_for(1000, "1g") == GRAM_
+
+    def test_svd_method_for_too_many_features(self):
+        assert _svd_method_for(GRAM_MAX_FEATURES_ + 1, "1t") == ARPACK_
+
+    def test_svd_method_for_small_driver_memory(self):
+        # 3 * 1000^2 doubles are 24MB, which is more than a quarter of 64MB
+        assert _svd_method_for(1000, "64m") == ARPACK_
+        assert _svd_method_for(1000, "128m") == GRAM_
@@ -19,14 +19,21 @@
 # @email = 'simon.dirmeier@bsse.ethz.ch'
 
 
+import os
+import tempfile
+
 import numpy
 import pandas
 import sklearn.decomposition
+from pyspark import StorageLevel
 from sklearn.preprocessing import scale
 
+from pybda.fit.dimension_reduction_fit import load
 from pybda.globals import FEATURES__
 from pybda.pca import PCA
 from pybda.spark.features import split_vector
+from pybda.stats.stats import cumulative_explained_variance
+from pybda.transform import as_estimator
 from tests.test_dimred_api import TestDimredAPI
 
 
@@ -66,6 +73,23 @@ class TestPCA(TestDimredAPI):
         cls.sk_pca_trans = cls.sk_pca.fit(cls.X_lo).transform(cls.X_lo)
         k = 2
 
+        cls.inc_pca = PCA(cls.spark(), 2, cls.features())
+        for i in [slice(0, 4), slice(4, 10)]:
+            df = pandas.DataFrame(data=cls.X_lo[i], columns=cls.features())
+            cls.inc_pca.partial_fit(TestDimredAPI.spark().createDataFrame(df))
+        cls.inc_trans = split_vector(
+            cls.inc_pca.transform(cls._spark_lo).data.select(FEATURES__),
+            FEATURES__).toPandas().values
+
+        cls.tmp_dir = tempfile.mkdtemp()
+        outfile = os.path.join(cls.tmp_dir, "pca")
+        cls.pca.model.save(outfile)
+        cls.saved_model = load(outfile)
+        saved_pca = as_estimator(cls.spark(), cls.saved_model)
+        cls.saved_trans = split_vector(
+            saved_pca.transform(cls._spark_lo).data.select(FEATURES__),
+            FEATURES__).toPandas().values
+
     @classmethod
     def tearDownClass(cls):
         cls.log("PCA")
@@ -94,3 +118,65 @@ class TestPCA(TestDimredAPI):
             ax2 = sorted(numpy.absolute(self.fittransform_trans[:, i]))
             assert numpy.allclose(ax1, ax2, atol=1e-01)
 
+    def test_pca_unpersists_after_fit(self):
+        sc = self.spark().sparkContext
+        n_persisted = len(sc._jsc.getPersistentRDDs())
+        PCA(self.spark(), 2, self.features()).fit(self._spark_lo)
+        assert len(sc._jsc.getPersistentRDDs()) == n_persisted
+
+    def test_pca_unpersists_after_failed_fit(self):
+        class FailingPCA(PCA):
+            def _compute_pcs(self, X, n):
+                raise ArithmeticError("SVD did not converge")
+
+        sc = self.spark().sparkContext
+        n_persisted = len(sc._jsc.getPersistentRDDs())
+        with self.assertRaises(ArithmeticError):
+            FailingPCA(self.spark(), 2, self.features()).fit(self._spark_lo)
+        assert len(sc._jsc.getPersistentRDDs()) == n_persisted
+
+    def test_pca_storage_level(self):
+        pca = PCA(self.spark(), 2, self.features(),
+                  storage_level="MEMORY_ONLY")
+        assert pca.storage_level == StorageLevel.MEMORY_ONLY
+        with self.assertRaises(ValueError):
+            PCA(self.spark(), 2, self.features(), storage_level="TAPE")
+
+    def test_pca_partial_fit_loadings(self):
+        assert numpy.allclose(
+          numpy.absolute(self.inc_pca.model.loadings[:2]),
+          numpy.absolute(self.loadings[:2]),
+          atol=1e-01)
+
+    def test_pca_partial_fit_sds(self):
+        assert numpy.allclose(self.inc_pca.model.sds, self.sds, atol=1e-01)
+
+    def test_pca_partial_fit_transform(self):
+        for i in range(2):
+            ax1 = sorted(numpy.absolute(self.trans[:, i]))
+            ax2 = sorted(numpy.absolute(self.inc_trans[:, i]))
+            assert numpy.allclose(ax1, ax2, atol=1e-01)
+
+    def test_pca_saved_model_loadings(self):
+        assert numpy.allclose(
+          self.saved_model.loadings, self.pca.model.loadings)
+        assert numpy.allclose(self.saved_model.means, self.pca.model.means)
+
+    def test_pca_saved_model_transform(self):
+        assert numpy.allclose(self.saved_trans, self.fittransform_trans)
+
+    def test_pca_write_parquet(self):
+        outfile = os.path.join(self.tmp_dir, "pca-transformed")
+        self.pca.transform(self._spark_lo).write_data(outfile, "parquet")
+        data = self.spark().read.parquet(outfile + ".parquet")
+        assert data.count() == self.X_lo.shape[0]
+
+    def test_pca_randomized_keeps_total_variance(self):
+        pca = PCA(self.spark(), 2, self.features(), "randomized")
+        pca.fit(self._spark_lo)
+        assert numpy.allclose(pca.model.total_variance,
+                              numpy.sum(self.sds ** 2))
+        cev = cumulative_explained_variance(
+          pca.model.sds, total=pca.model.total_variance)
+        assert numpy.allclose(
+          cev, numpy.cumsum(self.sk_pca.explained_variance_ratio_))
@@ -0,0 +1,108 @@
+# Copyright (C) 2018, 2019 Simon Dirmeier
+#
+# This file is part of pybda.
+#
+# pybda is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# pybda is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with pybda. If not, see <http://www.gnu.org/licenses/>.
+#
+# @author = 'Simon Dirmeier'
+# @email = 'simon.dirmeier@bsse.ethz.ch'
+
+
+import os
+import shutil
+import tempfile
+
+from pybda.globals import (CLUSTERING__, DIM_RED__, FEATURES__, INFILE__,
+                           KMEANS__, N_CENTERS__, N_COMPONENTS__,
+                           OUTFOLDER__, PCA__, SPARK__)
+from pybda.pipeline import Pipeline
+from pybda.pybda_config import PyBDAConfig
+from tests.test_api import TestAPI
+
+
+class RecordingPipeline(Pipeline):
+    """
+    Pipeline that records the data its clusterings receive
+    """
+
+    def __init__(self, spark, config):
+        super().__init__(spark, config)
+        self.clustering_data = None
+
+    def _clustering(self, algorithm, data, outpath):
+        self.clustering_data = data
+        return super()._clustering(algorithm, data, outpath)
+
+
+class TestPipeline(TestAPI):
+    """
+    Tests running a config in a single spark application
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.log("Pipeline")
+
+        data_path = os.path.join(
+          os.path.dirname(os.path.dirname(__file__)), "data")
+        cls._dir = tempfile.mkdtemp()
+        infile = os.path.join(cls._dir, "iris.tsv")
+        features = os.path.join(cls._dir, "iris_feature_columns.tsv")
+        shutil.copy(os.path.join(data_path, "iris.tsv"), infile)
+        shutil.copy(os.path.join(data_path, "iris_feature_columns.tsv"),
+                    features)
+
+        cls._outfolder = os.path.join(cls._dir, "out")
+        os.mkdir(cls._outfolder)
+        config = PyBDAConfig({
+            SPARK__: "spark-submit",
+            INFILE__: infile,
+            OUTFOLDER__: cls._outfolder,
+            FEATURES__: features,
+            DIM_RED__: PCA__,
+            N_COMPONENTS__: 2,
+            CLUSTERING__: KMEANS__,
+            N_CENTERS__: "2,3"
+        })
+        cls.pipeline = RecordingPipeline(cls.spark(), config)
+        cls.pipeline.run()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.log("Pipeline")
+        shutil.rmtree(cls._dir)
+        super().tearDownClass()
+
+    def out(self, name):
+        return os.path.join(self._outfolder, name)
+
+    def test_intermediate_model_is_written(self):
+        assert os.path.exists(self.out(PCA__ + "-model.json"))
+        assert os.path.exists(self.out(PCA__ + "-model.npz"))
+
+    def test_intermediate_data_is_not_written(self):
+        assert not os.path.exists(self.out(PCA__ + ".tsv"))
+        assert not os.path.exists(self.out(PCA__))
+
+    def test_leaf_clusters_are_written(self):
+        for k in [2, 3]:
+            assert os.path.isdir(
+              self.out("{}-transformed-K{}-clusters".format(KMEANS__, k)))
+
+    def test_clustering_receives_projected_features(self):
+        data = self.pipeline.clustering_data
+        assert FEATURES__ in data.columns
+        assert len(data.select(FEATURES__).first()[0]) == 2
+        assert data.count() == 150
@@ -27,7 +27,7 @@ from sklearn.decomposition import PCA
 from sklearn.preprocessing import scale
 
 from pybda.kpca import KPCA
-from pybda.stats.stats import fourier
+from pybda.stats.stats import fourier, sufficient_statistics
 from pybda.util.cast_as import as_rdd_of_array
 from tests.test_api import TestAPI
 from tests.test_dimred_api import TestDimredAPI
@@ -57,6 +57,8 @@ class TestStats(TestAPI):
         cls._sbf_X_transformed = cls.sbf_feature.fit_transform(cls._X)
         cls.Xf, cls.w, cls.b = fourier(
             RowMatrix(as_rdd_of_array(cls._spark_lo)), 5, 23, 1)
+        cls.stats = sufficient_statistics(
+            as_rdd_of_array(cls._spark_lo).repartition(3), gram=True)
 
     @classmethod
     def tearDownClass(cls):
@@ -83,3 +85,19 @@ class TestStats(TestAPI):
           numpy.absolute(self._sbf_X_transformed),
           atol=1e-01,
         )
+
+    def test_sufficient_statistics_n(self):
+        assert self.stats.n == self._X.shape[0]
+
+    def test_sufficient_statistics_mean(self):
+        assert numpy.allclose(self.stats.mean, self._X.mean(axis=0))
+
+    def test_sufficient_statistics_variance(self):
+        assert numpy.allclose(self.stats.variance(),
+                              self._X.var(axis=0, ddof=1))
+
+    def test_sufficient_statistics_gram(self):
+        assert numpy.allclose(self.stats.gram, self._X.T.dot(self._X))
+
+    def test_sufficient_statistics_covariance(self):
+        assert numpy.allclose(self.stats.covariance(), numpy.cov(self._X.T))